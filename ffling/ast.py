@@ -1,7 +1,7 @@
 # AST Node classes
 
 class Node:
-    pass
+    line = None  # set on statements by the parser
 
 class Program(Node):
     def __init__(self, statements):
@@ -15,6 +15,7 @@ class Assignment(Node):
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.appends = None  # filled in by the interpreter
 
 class If(Node):
     def __init__(self, condition, then_block, elifs=None, else_block=None):
@@ -29,9 +30,9 @@ class Elif(Node):
         self.block = block
 
 class For(Node):
-    def __init__(self, var, range_expr, block):
+    def __init__(self, var, range_args, block):
         self.var = var
-        self.range_expr = range_expr
+        self.range_args = range_args  # start/stop/step as in Python
         self.block = block
 
 class While(Node):
@@ -59,6 +60,10 @@ class Call(Node):
     def __init__(self, callee, args):
         self.callee = callee
         self.args = args
+        # Inline cache, filled in by the interpreter
+        self.cache_version = -1
+        self.cache_func = None
+        self.cache_kind = None
 
 class Variable(Node):
     def __init__(self, name):
@@ -73,10 +78,39 @@ class BinOp(Node):
         self.left = left
         self.op = op
         self.right = right
+        # Quickening state, filled in by the interpreter
+        self.seen = None
+        self.warmup = 0
+        self.quick = None
+        self.deopts = 0
+
+class UnaryOp(Node):
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
 
 class Table(Node):
-    def __init__(self, pairs):
+    def __init__(self, pairs, items=None):
         self.pairs = pairs
+        self.items = items or []
+
+class Index(Node):
+    def __init__(self, obj, key):
+        self.obj = obj
+        self.key = key
+
+class IndexAssign(Node):
+    def __init__(self, obj, key, value):
+        self.obj = obj
+        self.key = key
+        self.value = value
+        self.appends = None  # filled in by the interpreter
+
+class ForEach(Node):
+    def __init__(self, var, iterable, block):
+        self.var = var
+        self.iterable = iterable
+        self.block = block
 
 class Import(Node):
     def __init__(self, path):
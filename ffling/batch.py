@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+FFling Batch Runner - runs many .ffling files across worker processes
+"""
+
+import io
+import os
+import sys
+import glob
+import time
+import pickle
+import hashlib
+import argparse
+import functools
+import multiprocessing
+from lexer import Lexer
+from parser_ll import Parser
+from interpreter import Interpreter
+from budget import Budget, BudgetExceeded, LIMIT_FLAGS
+
+CACHE_DIR = os.environ.get('FFLING_CACHE', os.path.join(os.path.expanduser('~'), '.ffling_cache'))
+
+def compiler_fingerprint():
+    # Cached programs are only valid for the lexer/parser/AST that built them
+    digest = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ('lexer.py', 'parser_ll.py', 'ast.py'):
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+FINGERPRINT = compiler_fingerprint()
+
+def load_program(filename):
+    # Parse through an on-disk cache keyed by source contents, shared by
+    # every worker and every later run
+    with open(filename, 'rb') as f:
+        source = f.read()
+    key = hashlib.sha1(source).hexdigest()
+    path = os.path.join(CACHE_DIR, f"{FINGERPRINT}-{key}.pickle")
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    program = Parser(Lexer(source).tokenize()).parse()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(program, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except (OSError, RecursionError, pickle.PicklingError):
+        pass
+    return program
+
+def reset_peak_memory():
+    # Linux lets a process reset its own high-water mark, which keeps the
+    # peak per file even though workers are reused
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peak_memory():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def run_file(filename, limits=None):
+    output = io.StringIO()
+    old_stdout, old_stdin = sys.stdout, sys.stdin
+    sys.stdout = output
+    sys.stdin = io.StringIO('')
+    status, error = 'ok', None
+    reset_peak_memory()
+    start = time.perf_counter()
+    try:
+        program = load_program(filename)
+        interpreter = Interpreter()
+        if limits:
+            interpreter.set_budget(Budget(**limits))
+        interpreter.execute(program)
+    except SyntaxError as e:
+        status, error = 'syntax', str(e)
+    except BudgetExceeded as e:
+        status, error = 'limit', str(e)
+    except Exception as e:
+        status, error = 'error', str(e)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = peak_memory()
+        sys.stdout, sys.stdin = old_stdout, old_stdin
+    return filename, status, elapsed, peak, output.getvalue(), error
+
+def expand(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, '**', '*.ffling'), recursive=True)))
+        elif any(c in pattern for c in '*?['):
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            files.append(pattern)
+    return files
+
+def save_output(out_dir, filename, output):
+    name = os.path.splitext(os.path.basename(filename))[0]
+    digest = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()[:8]
+    with open(os.path.join(out_dir, f"{name}-{digest}.out"), 'w') as f:
+        f.write(output)
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(prog='main.py batch', description='Run many FFling files in parallel.')
+    arg_parser.add_argument('files', nargs='+', help='files, directories or glob patterns')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    arg_parser.add_argument('--out', help='directory to write each file\'s output to')
+    arg_parser.add_argument('--max-steps', type=LIMIT_FLAGS['--max-steps'][1], help='statements each file may run')
+    arg_parser.add_argument('--max-time', type=LIMIT_FLAGS['--max-time'][1], help='seconds each file may run')
+    arg_parser.add_argument('--max-memory', type=LIMIT_FLAGS['--max-memory'][1], help='MB of memory each worker may use')
+    options = arg_parser.parse_args(argv)
+    limits = {name: getattr(options, name) for name, _ in LIMIT_FLAGS.values() if getattr(options, name) is not None}
+
+    files = expand(options.files)
+    if not files:
+        print("No FFling files found")
+        return 1
+    if options.out:
+        os.makedirs(options.out, exist_ok=True)
+
+    results = {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(max(1, options.jobs)) as pool:
+        for result in pool.imap_unordered(functools.partial(run_file, limits=limits), files):
+            results[result[0]] = result
+            if options.out:
+                save_output(options.out, result[0], result[4])
+    total = time.perf_counter() - start
+
+    width = max(len(f) for f in files)
+    print(f"{'File':<{width}}  {'Status':<7} {'Time(ms)':>10} {'Peak RSS(KB)':>13}")
+    failed = 0
+    for filename in files:
+        _, status, elapsed, peak, _, error = results[filename]
+        peak_kb = f"{peak / 1024:.0f}" if peak is not None else '-'
+        print(f"{filename:<{width}}  {status:<7} {elapsed * 1000:>10.1f} {peak_kb:>13}")
+        if error:
+            failed += 1
+            print(f"    {error}")
+    print(f"\n{len(files)} files, {len(files) - failed} ok, {failed} failed in {total:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+# The `bench` library: times FFling functions from inside FFling with
+# perf_counter_ns.
+#
+# A function is warmed up first (which also lets the quickener and the JIT
+# settle), then called in batches big enough that each batch outlasts the
+# timer's resolution. The per-call cost of a no-op of the same kind (an empty
+# FFling function, or a builtin that does nothing) taking as many arguments,
+# measured the same way, is subtracted from the summary statistics; the
+# spread is left as measured.
+
+import math
+import time
+from runtime import FFTable
+from interpreter import FuncDef, FFLibilFun
+
+WARMUP_NS = 100_000_000
+TARGET_NS = 1_000_000_000
+CALIBRATION_NS = 200_000_000
+SAMPLE_NS = 1_000_000
+MIN_SAMPLES = 10
+MAX_SAMPLES = 1000
+
+class Bench:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.overhead = {}  # ns per call of a no-op, by callee kind and arity
+
+    def caller(self, func, args):
+        if isinstance(func, FuncDef):
+            call_function = self.interpreter.call_function
+            env = self.interpreter.glob_env
+            return lambda: call_function(func, args, env)
+        elif callable(func):
+            return lambda: func(args)
+        raise ValueError("bench_run expects a function")
+
+    def time_batch(self, call, count):
+        now = time.perf_counter_ns
+        start = now()
+        for _ in range(count):
+            call()
+        return now() - start
+
+    def measure(self, call, target):
+        # Per-call times in ns, one per sample, and the batch size used
+        spent = 0
+        count = 1
+        while spent < WARMUP_NS:
+            spent += self.time_batch(call, count)
+            count *= 2
+        batch = 1
+        while True:
+            elapsed = self.time_batch(call, batch)
+            if elapsed >= SAMPLE_NS:
+                break
+            batch = max(batch * 2, math.ceil(batch * SAMPLE_NS / max(elapsed, 1)))
+        samples = [elapsed / batch]
+        deadline = time.perf_counter_ns() + target
+        while len(samples) < MIN_SAMPLES or (len(samples) < MAX_SAMPLES and time.perf_counter_ns() < deadline):
+            samples.append(self.time_batch(call, batch) / batch)
+        return samples, batch
+
+    def calibrate(self, func, args):
+        arity = len(args)
+        key = (type(func), arity)
+        if key not in self.overhead:
+            if isinstance(func, FuncDef):
+                empty = FuncDef([f"arg{i}" for i in range(arity)], [], '<bench calibration>')
+            elif isinstance(func, FFLibilFun):
+                empty = FFLibilFun(noop)
+            else:
+                empty = noop
+            samples, _ = self.measure(self.caller(empty, args), CALIBRATION_NS)
+            self.overhead[key] = median(sorted(samples))
+        return self.overhead[key]
+
+    def run(self, args):
+        # bench_run(func, args...)
+        if not args:
+            raise ValueError("bench_run expects a function")
+        call = self.caller(args[0], list(args[1:]))
+        overhead = self.calibrate(args[0], list(args[1:]))
+        samples, batch = self.measure(call, TARGET_NS)
+        # Only the summary is clamped at zero: clamping each sample would
+        # pull the mean and stddev up for anything as cheap as the no-op
+        values = sorted(samples)
+        mean = sum(values) / len(values)
+        variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+        return FFTable(hash={
+            'min': max(0.0, values[0] - overhead),
+            'median': max(0.0, median(values) - overhead),
+            'p95': max(0.0, values[math.ceil(0.95 * len(values)) - 1] - overhead),
+            'mean': max(0.0, mean - overhead),
+            'stddev': math.sqrt(variance),
+            'samples': len(values),
+            'iterations': len(values) * batch,
+            'overhead': overhead,
+        })
+
+    def now(self, args):
+        return time.perf_counter_ns()
+
+def noop(args):
+    return None
+
+def median(values):
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
@@ -0,0 +1,66 @@
+# Per-run limits on executed statements, wall time and memory.
+#
+# The interpreter charges statements to a countdown as each block starts and
+# only calls Budget.check when the countdown runs out, so the clock and the
+# memory are read once every CHECK_INTERVAL statements instead of per node.
+
+import os
+import time
+
+CHECK_INTERVAL = 1000
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+def current_memory():
+    # Resident set size in bytes, None where it can't be read
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Only the peak is available here, which is still a safe upper bound
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+class Budget:
+    def __init__(self, max_steps=None, max_time=None, max_memory=None):
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_memory = max_memory  # bytes
+        self.steps = 0
+        self.deadline = None
+
+    def start(self):
+        self.steps = 0
+        if self.max_time is not None:
+            self.deadline = time.monotonic() + self.max_time
+
+    def interval(self):
+        # Statements to run before the next check
+        if self.max_steps is None:
+            return CHECK_INTERVAL
+        return max(0, min(CHECK_INTERVAL, self.max_steps - self.steps))
+
+    def check(self, steps, line):
+        self.steps += steps
+        where = f" at line {line}" if line is not None else ''
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded(f"Step limit of {self.max_steps} exceeded{where}")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(f"Time limit of {self.max_time:g}s exceeded{where}")
+        if self.max_memory is not None:
+            memory = current_memory()
+            if memory is not None and memory > self.max_memory:
+                raise BudgetExceeded(f"Memory limit of {self.max_memory // (1024 * 1024)} MB exceeded{where}")
+
+# Command line flags shared by main.py and batch mode
+LIMIT_FLAGS = {
+    '--max-steps': ('max_steps', int),
+    '--max-time': ('max_time', float),
+    '--max-memory': ('max_memory', lambda mb: int(float(mb) * 1024 * 1024)),
+}
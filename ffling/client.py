@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+FFling Client - runs a script on a warm FFling server
+Only imports the standard library so startup stays cheap.
+"""
+
+import os
+import sys
+import json
+import socket
+
+def main():
+    if len(sys.argv) < 2:
+        print("Kullanım: python client.py <ffling_dosya> [argümanlar...]")
+        sys.exit(1)
+
+    path = os.environ.get('FFLING_SOCKET', '/tmp/ffling.sock')
+    stdin = '' if sys.stdin is None or sys.stdin.isatty() else sys.stdin.read()
+    request = {
+        'path': os.path.abspath(sys.argv[1]),
+        'args': sys.argv[2:],
+        'stdin': stdin,
+        'cwd': os.getcwd(),
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        print(f"FFling server is not running on {path}")
+        sys.exit(1)
+    sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+
+    status = 1
+    with sock.makefile('r', encoding='utf-8') as reader:
+        for line in reader:
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'err' in message:
+                sys.stderr.write(message['err'])
+            elif 'exit' in message:
+                status = message['exit']
+                break
+    sock.close()
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
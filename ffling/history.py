@@ -0,0 +1,150 @@
+# Persistent REPL history: an append-only file with one JSON string per line,
+# read only when the history is first looked at, and searched through an
+# inverted index from tokens to entry numbers that is built on the first
+# search and kept up to date after that.
+
+import os
+import re
+import json
+import heapq
+
+HISTORY_FILE = os.environ.get('FFLING_HISTORY', os.path.join(os.path.expanduser('~'), '.ffling_history'))
+# Once the file grows past MAX_BYTES the oldest entries are dropped until it
+# is back under KEEP_BYTES, so it isn't rewritten on every append
+MAX_BYTES = 16 * 1024 * 1024
+KEEP_BYTES = 12 * 1024 * 1024
+
+TOKEN_RE = re.compile(r'\w+')
+
+class History:
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.entries = None
+        self.index = None
+        self.size = None
+
+    def load(self):
+        if self.entries is not None:
+            return
+        self.entries = []
+        self.index = None
+        decode = json.JSONDecoder().raw_decode
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = decode(line)[0]
+                    except ValueError:
+                        continue
+                    if isinstance(entry, str):
+                        self.entries.append(entry)
+        except OSError:
+            pass
+
+    def build_index(self):
+        self.load()
+        if self.index is not None:
+            return
+        self.index = {}
+        for number, entry in enumerate(self.entries):
+            self.index_entry(number, entry)
+
+    def index_entry(self, number, entry):
+        index = self.index
+        for token in set(TOKEN_RE.findall(entry)):
+            postings = index.get(token)
+            if postings is None:
+                index[token] = [number]
+            else:
+                postings.append(number)
+
+    def add(self, entry):
+        line = json.dumps(entry) + '\n'
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                self.size = f.tell()
+        except OSError:
+            pass
+        if self.entries is not None:
+            self.entries.append(entry)
+            if self.index is not None:
+                self.index_entry(len(self.entries) - 1, entry)
+        if self.size is not None and self.size > MAX_BYTES:
+            self.evict()
+
+    def evict(self):
+        self.entries = None
+        self.load()
+        kept = []
+        size = 0
+        for entry in reversed(self.entries):
+            line = json.dumps(entry) + '\n'
+            size += len(line.encode('utf-8'))
+            if size > KEEP_BYTES:
+                break
+            kept.append(line)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(reversed(kept))
+            os.replace(tmp, self.path)
+        except OSError:
+            return
+        self.entries = None
+        self.size = None
+        self.load()
+
+    def clear(self):
+        try:
+            open(self.path, 'w').close()
+        except OSError:
+            pass
+        self.entries = []
+        self.index = None
+        self.size = 0
+
+    def search(self, query, limit=10):
+        # Same matches as `query in entry`, newest last. Only entries holding
+        # one of the query's words are checked: a word inside the query must
+        # appear whole, so one of those is used when there is one; otherwise
+        # the longest word, which may be part of a longer one.
+        self.build_index()
+        words = sorted(TOKEN_RE.finditer(query), key=lambda m: (m.start() == 0 or m.end() == len(query), -len(m.group())))
+        if words:
+            word = words[0]
+            postings = self.postings(word.group(), word.start() == 0, word.end() == len(query))
+            candidates = heapq.merge(*[reversed(p) for p in postings], reverse=True)
+        else:
+            candidates = reversed(range(len(self.entries)))
+        matches = []
+        previous = None
+        for number in candidates:
+            if number == previous:
+                continue
+            previous = number
+            if query in self.entries[number]:
+                matches.append(self.entries[number])
+                if len(matches) == limit:
+                    break
+        return matches[::-1]
+
+    def postings(self, token, open_start, open_end):
+        # Posting lists of every indexed word the token could be
+        if not open_start and not open_end:
+            return [self.index[token]] if token in self.index else []
+        if open_start and open_end:
+            fits = lambda word: token in word
+        elif open_start:
+            fits = lambda word: word.endswith(token)
+        else:
+            fits = lambda word: word.startswith(token)
+        return [postings for word, postings in self.index.items() if fits(word)]
+
+    def __len__(self):
+        self.load()
+        return len(self.entries)
+
+    def __getitem__(self, key):
+        self.load()
+        return self.entries[key]
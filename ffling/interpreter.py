@@ -1,4 +1,39 @@
 from ast import *
+from runtime import FFTable, StringBuilder, iterate, ffrange, inputlines, filelines
+from jit import JIT, JIT_THRESHOLD
+import itertools
+import operator
+import sys
+
+# BinOp nodes that keep seeing the same operand types get quickened into
+# one of these after QUICKEN_THRESHOLD evaluations. Both operands always
+# have the same type, so the quickened path checks just that one type.
+QUICKEN_THRESHOLD = 8
+MAX_DEOPTS = 4
+# Free call frames kept per function
+FRAME_POOL_LIMIT = 64
+SPECIALIZATIONS = {
+    ('PLUS', int, int): operator.add,
+    ('PLUS', float, float): operator.add,
+    ('PLUS', str, str): operator.add,
+    ('MINUS', int, int): operator.sub,
+    ('MINUS', float, float): operator.sub,
+    ('MUL', int, int): operator.mul,
+    ('MUL', float, float): operator.mul,
+    ('DIV', int, int): operator.truediv,
+    ('DIV', float, float): operator.truediv,
+    ('MOD', int, int): operator.mod,
+    ('EQ', int, int): operator.eq,
+    ('EQ', str, str): operator.eq,
+    ('GT', int, int): operator.gt,
+    ('GT', float, float): operator.gt,
+    ('LT', int, int): operator.lt,
+    ('LT', float, float): operator.lt,
+}
+
+# Shared by every Interpreter so a parsed Program can be reused by a fresh
+# interpreter without its call sites hitting stale caches
+call_versions = itertools.count()
 
 class Environment:
     def __init__(self, parent=None):
@@ -16,17 +51,41 @@ class Environment:
         self.vars[name] = value
 
 class Interpreter:
-    def __init__(self):
+    def __init__(self, argv=None):
         self.glob_env = Environment()
+        self.quicken_stats = {'quickened': 0, 'deopts': 0}
+        # BinOp nodes that got hot or kept changing operand types; their
+        # quick/deopts fields are only read when stats are asked for
+        self.hot_binops = set()
+        # Call sites cache their resolved callee until call_version moves.
+        # Binding a name that has been called bumps the version.
+        self.call_version = next(call_versions)
+        self.call_names = set()
+        self.jit = JIT(self)
+        # Call frames handed out by call_function, fresh vs. recycled
+        self.frame_stats = {'allocated': 0, 'reused': 0}
+        self.free_envs = []
+        # Statements left before the budget is checked again, see exec_block
+        self.budget = None
+        self.steps_left = self.step_interval = sys.maxsize
         # Builtins
         self.glob_env.set('printline', lambda args: self.builtin_printline(args))
         self.glob_env.set('printlinef', lambda args: self.builtin_printline(args))  # Same for now
         self.glob_env.set('range', lambda args: self.builtin_range(args))
         self.glob_env.set('inputline', FFLibilFun(lambda args: input()))
+        self.glob_env.set('inputlines', FFLibilFun(lambda args: inputlines()))
+        self.glob_env.set('filelines', FFLibilFun(lambda args: filelines(*args)))
+        self.glob_env.set('args', FFTable(list(argv or [])))
 
     def execute(self, program):
-        for stmt in program.statements:
-            self.eval_stmt(stmt, self.glob_env)
+        self.exec_block(program.statements, self.glob_env)
+
+    def set_budget(self, budget):
+        # Call before running anything: compiled functions don't go through
+        # exec_block, so the JIT stays off while a budget is set
+        self.budget = budget
+        budget.start()
+        self.steps_left = self.step_interval = budget.interval()
 
     def eval_stmt(self, stmt, env):
         if isinstance(stmt, Printline):
@@ -34,8 +93,13 @@ class Interpreter:
             printline_func = self.glob_env.get('printline')
             printline_func(args)
         elif isinstance(stmt, Assignment):
+            if stmt.appends is None:
+                stmt.appends = self.find_append(stmt)
+            if stmt.appends:
+                self.exec_append(stmt, env)
+                return
             value = self.eval_expr(stmt.value, env)
-            env.set(stmt.name, value)
+            self.bind(env, stmt.name, value)
         elif isinstance(stmt, If):
             if self.eval_expr(stmt.condition, env):
                 self.exec_block(stmt.then_block, env)
@@ -47,10 +111,21 @@ class Interpreter:
                 if stmt.else_block:
                     self.exec_block(stmt.else_block, env)
         elif isinstance(stmt, For):
-            range_arg = self.eval_expr(stmt.range_expr, env)
-            for i in range(range_arg):
+            bounds = [self.eval_expr(arg, env) for arg in stmt.range_args]
+            for i in ffrange(*bounds):
+                local_env = Environment(env)
+                self.bind(local_env, stmt.var, i)
+                try:
+                    self.exec_block(stmt.block, local_env)
+                except BreakException:
+                    break
+                except ContinueException:
+                    continue
+        elif isinstance(stmt, ForEach):
+            iterable = iterate(self.eval_expr(stmt.iterable, env))
+            for item in iterable:
                 local_env = Environment(env)
-                local_env.set(stmt.var, i)
+                self.bind(local_env, stmt.var, item)
                 try:
                     self.exec_block(stmt.block, local_env)
                 except BreakException:
@@ -71,32 +146,33 @@ class Interpreter:
         elif isinstance(stmt, Continue):
             raise ContinueException()
         elif isinstance(stmt, Func):
-            env.set(stmt.name, FuncDef(stmt.params, stmt.block))
+            self.bind(env, stmt.name, FuncDef(stmt.params, stmt.block, stmt.name))
         elif isinstance(stmt, Return):
             val = self.eval_expr(stmt.value, env) if stmt.value else None
             raise ReturnException(val)
         elif isinstance(stmt, Call):
-            # Function call
-            func = env.get(stmt.callee)
-            args = [self.eval_expr(arg, env) for arg in stmt.args]
-            if isinstance(func, FuncDef):
-                local_env = Environment(env)
-                for param, arg_val in zip(func.params, args):
-                    local_env.set(param, arg_val)
-                try:
-                    self.exec_block(func.block, local_env)
-                except ReturnException as e:
-                    return e.value
-            elif callable(func):
-                return func(args)
-            else:
-                raise ValueError(f"{stmt.callee} is not callable")
+            return self.eval_call(stmt, env)
+        elif isinstance(stmt, IndexAssign):
+            table = self.eval_expr(stmt.obj, env)
+            if not isinstance(table, FFTable):
+                raise ValueError(f"Cannot index-assign into {table}")
+            if stmt.appends is None:
+                stmt.appends = self.find_append(stmt)
+            if stmt.appends:
+                self.exec_table_append(stmt, table, env)
+                return
+            table.set(self.eval_expr(stmt.key, env), self.eval_expr(stmt.value, env))
         elif isinstance(stmt, Import):
             lib = stmt.path
             if lib == 'time':
                 import time as pytime
-                env.set('time_time', FFLibilFun(lambda args: pytime.time()))
-                env.set('time_sleep', FFLibilFun(lambda args: pytime.sleep(args[0] if len(args) > 0 else 1)))
+                self.bind(env, 'time_time', FFLibilFun(lambda args: pytime.time()))
+                self.bind(env, 'time_sleep', FFLibilFun(lambda args: pytime.sleep(args[0] if len(args) > 0 else 1)))
+            elif lib == 'bench':
+                from bench import Bench
+                bench = Bench(self)
+                self.bind(env, 'bench_run', FFLibilFun(bench.run))
+                self.bind(env, 'bench_now', FFLibilFun(bench.now))
             # Add more libs
         else:
             # Expression statement
@@ -106,56 +182,301 @@ class Interpreter:
         if isinstance(expr, Literal):
             return expr.value
         elif isinstance(expr, Variable):
-            return env.get(expr.name)
+            value = env.get(expr.name)
+            if type(value) is StringBuilder:
+                return value.build()
+            return value
         elif isinstance(expr, BinOp):
-            left = self.eval_expr(expr.left, env)
-            right = self.eval_expr(expr.right, env)
-            if expr.op == 'PLUS':
-                return left + right
-            elif expr.op == 'MINUS':
-                return left - right
-            elif expr.op == 'MUL':
-                return left * right
-            elif expr.op == 'DIV':
-                return left / right
-            elif expr.op == 'EQ':
-                return left == right
-            elif expr.op == 'GT':
-                return left > right
-            elif expr.op == 'LT':
-                return left < right
-            elif expr.op == 'AND':
-                return left and right
-            elif expr.op == 'OR':
-                return left or right
-            elif expr.op == 'MOD':
-                return left % right
+            # Long a + b + c ... chains are left-deep; walk the spine with an
+            # explicit stack instead of recursing once per operator
+            spine = [expr]
+            node = expr.left
+            while isinstance(node, BinOp):
+                spine.append(node)
+                node = node.left
+            value = self.eval_expr(node, env)
+            for node in reversed(spine):
+                quick = node.quick
+                if quick is not None:
+                    right = self.eval_expr(node.right, env)
+                    if type(value) is type(right) is quick[0]:
+                        value = quick[1](value, right)
+                        continue
+                    self.deoptimize(node)
+                    value = self.apply_binop(node.op, value, right)
+                elif node.op == 'AND':
+                    value = self.eval_expr(node.right, env) if value else value
+                elif node.op == 'OR':
+                    value = value if value else self.eval_expr(node.right, env)
+                else:
+                    right = self.eval_expr(node.right, env)
+                    if node.deopts < MAX_DEOPTS:
+                        self.observe(node, value, right)
+                    value = self.apply_binop(node.op, value, right)
+            return value
+        elif isinstance(expr, UnaryOp):
+            operand = self.eval_expr(expr.operand, env)
+            if expr.op == 'LEN':
+                if isinstance(operand, (FFTable, str, range)):
+                    return len(operand)
+                raise ValueError(f"Cannot take length of {operand}")
+            elif expr.op == 'NOT':
+                return not operand
             else:
                 raise ValueError(f"Unknown operator {expr.op}")
         elif isinstance(expr, Table):
-            table = {}
+            table = FFTable([self.eval_expr(item, env) for item in expr.items])
             for k, v in expr.pairs.items():
-                table[k] = self.eval_expr(v, env)
+                table.set(k, self.eval_expr(v, env))
             return table
+        elif isinstance(expr, Index):
+            obj = self.eval_expr(expr.obj, env)
+            key = self.eval_expr(expr.key, env)
+            if isinstance(obj, FFTable):
+                return obj.get(key)
+            elif isinstance(obj, (str, range)):
+                return obj[key]
+            else:
+                raise ValueError(f"Cannot index {obj}")
         elif isinstance(expr, Call):
-            return self.eval_stmt(expr, env)  # Reuse
+            return self.eval_call(expr, env)
         else:
             raise ValueError(f"Unknown expression {expr}")
 
+    def apply_binop(self, op, left, right):
+        if op == 'PLUS':
+            return left + right
+        elif op == 'MINUS':
+            return left - right
+        elif op == 'MUL':
+            return left * right
+        elif op == 'DIV':
+            return left / right
+        elif op == 'EQ':
+            return left == right
+        elif op == 'GT':
+            return left > right
+        elif op == 'LT':
+            return left < right
+        elif op == 'MOD':
+            return left % right
+        else:
+            raise ValueError(f"Unknown operator {op}")
+
+    def eval_call(self, stmt, env):
+        if stmt.cache_version == self.call_version:
+            func = stmt.cache_func
+        else:
+            func = self.resolve_call(stmt, env)
+        args = [self.eval_expr(arg, env) for arg in stmt.args]
+        if stmt.cache_kind != 'ffling':
+            return func(args)
+        return self.call_function(func, args, env)
+
+    def call_function(self, func, args, env):
+        if func.compiled and len(args) >= len(func.params):
+            self.jit.stats['compiled_calls'] += 1
+            return func.compiled(env, *args)
+        func.calls += 1
+        if func.calls == JIT_THRESHOLD and func.compiled is None and self.budget is None:
+            self.jit.compile(func)
+        full = len(args) >= len(func.params)
+        if full and func.frames:
+            local_env = func.frames.pop()
+            local_env.parent = env
+            local_vars = local_env.vars
+            for name, value in zip(func.params, args):
+                local_vars[name] = value
+            self.frame_stats['reused'] += 1
+        else:
+            local_env = Environment(env)
+            local_env.vars.update(zip(func.params, args))
+            self.frame_stats['allocated'] += 1
+        if not self.call_names.isdisjoint(local_env.vars):
+            self.call_version = next(call_versions)
+        try:
+            self.exec_block(func.block, local_env)
+        except ReturnException as e:
+            return e.value
+        finally:
+            if full:
+                self.recycle(func, local_env)
+
+    def recycle(self, func, env):
+        # Functions don't close over their frame, so nothing can still see it
+        # once the call is over. Locals were bound after the parameters, so
+        # popping down to the parameter count leaves just those, and the dict
+        # keeps the size it grew to for the next call.
+        if len(func.frames) >= FRAME_POOL_LIMIT:
+            return
+        local_vars = env.vars
+        while len(local_vars) > func.arity:
+            local_vars.popitem()
+        for name in local_vars:
+            local_vars[name] = None
+        env.parent = None
+        func.frames.append(env)
+
+    def lookup(self, env, name):
+        value = env.get(name)
+        if type(value) is StringBuilder:
+            return value.build()
+        return value
+
+    def invoke(self, name, func, args, env, frame):
+        # Calls made from JIT-compiled code. The caller's locals only exist
+        # as Python variables, so they are put back into an Environment for
+        # the callee to see.
+        if isinstance(func, FuncDef):
+            # frame is a fresh dict built by the caller, so it is used as is
+            if self.free_envs:
+                caller_env = self.free_envs.pop()
+                caller_env.parent = env
+                self.frame_stats['reused'] += 1
+            else:
+                caller_env = Environment(env)
+                self.frame_stats['allocated'] += 1
+            caller_env.vars = frame
+            if not self.call_names.isdisjoint(frame):
+                self.call_version = next(call_versions)
+            try:
+                return self.call_function(func, args, caller_env)
+            finally:
+                caller_env.vars = caller_env.parent = None
+                if len(self.free_envs) < FRAME_POOL_LIMIT:
+                    self.free_envs.append(caller_env)
+        elif callable(func):
+            return func(args)
+        raise ValueError(f"{name} is not callable")
+
+    def bind(self, env, name, value):
+        env.set(name, value)
+        if name in self.call_names:
+            self.call_version = next(call_versions)
+
+    def resolve_call(self, stmt, env):
+        name = stmt.callee
+        scope = env
+        while name not in scope.vars:
+            scope = scope.parent
+            if scope is None:
+                raise NameError(f"Undefined variable {name}")
+        func = scope.vars[name]
+        if isinstance(func, FuncDef):
+            kind = 'ffling'
+        elif callable(func):
+            kind = 'builtin'
+        else:
+            raise ValueError(f"{stmt.callee} is not callable")
+        self.call_names.add(name)
+        stmt.cache_func = func
+        stmt.cache_kind = kind
+        # Only callees found in the globals are kept: while a local binding
+        # of the name is live, it is on the chain of every running scope, so
+        # all calls to the name look it up again
+        stmt.cache_version = self.call_version if scope is self.glob_env else -1
+        return func
+
+    def observe(self, expr, left, right):
+        types = (type(left), type(right))
+        if types != expr.seen:
+            if expr.seen is not None:
+                self.hot_binops.add(expr)
+            expr.seen = types
+            expr.warmup = 1
+            return
+        expr.warmup += 1
+        if expr.warmup >= QUICKEN_THRESHOLD:
+            expr.warmup = 0
+            self.hot_binops.add(expr)
+            fast = SPECIALIZATIONS.get((expr.op,) + types)
+            if fast is not None:
+                expr.quick = (types[0], fast)
+                self.quicken_stats['quickened'] += 1
+
+    def deoptimize(self, expr):
+        expr.quick = None
+        expr.seen = None
+        expr.warmup = 0
+        expr.deopts += 1
+        self.quicken_stats['deopts'] += 1
+
+    def find_append(self, stmt):
+        # The pieces of `local s = s + a + b` or `t.s = t.s + a + b`, or ()
+        # when the statement doesn't append to what it assigns
+        pieces = []
+        node = stmt.value
+        while isinstance(node, BinOp) and node.op == 'PLUS':
+            pieces.append(node.right)
+            node = node.left
+        if isinstance(stmt, Assignment):
+            same = isinstance(node, Variable) and node.name == stmt.name
+        else:
+            # Only t.name and t["name"]: the key is a plain string, so the
+            # slot is in the hash part
+            same = (isinstance(node, Index) and isinstance(stmt.obj, Variable) and isinstance(node.obj, Variable)
+                    and node.obj.name == stmt.obj.name and isinstance(stmt.key, Literal) and isinstance(node.key, Literal)
+                    and type(stmt.key.value) is str and node.key.value == stmt.key.value)
+        return tuple(reversed(pieces)) if same else ()
+
+    def exec_append(self, stmt, env):
+        # Append to a StringBuilder kept in the variable slot instead of
+        # copying the whole string every time
+        current = env.get(stmt.name)
+        values = [self.eval_expr(piece, env) for piece in stmt.appends]
+        if isinstance(current, (str, StringBuilder)) and all(type(v) is str for v in values):
+            builder = env.vars.get(stmt.name)
+            if type(builder) is not StringBuilder:
+                builder = StringBuilder(str(current))
+                self.bind(env, stmt.name, builder)
+            builder.extend(values)
+        else:
+            if type(current) is StringBuilder:
+                current = current.build()
+            for v in values:
+                current = current + v
+            self.bind(env, stmt.name, current)
+
+    def exec_table_append(self, stmt, table, env):
+        # Same for a table slot, which unlike a local outlives the loop
+        # iteration that appends to it
+        key = stmt.key.value
+        current = table.hash.get(key)
+        values = [self.eval_expr(piece, env) for piece in stmt.appends]
+        if isinstance(current, (str, StringBuilder)) and all(type(v) is str for v in values):
+            if type(current) is not StringBuilder:
+                current = table.hash[key] = StringBuilder(current)
+            current.extend(values)
+        else:
+            if type(current) is StringBuilder:
+                current = current.build()
+            for v in values:
+                current = current + v
+            table.set(key, current)
+
     def exec_block(self, block, env):
+        # A block's statements are charged up front as it starts
+        self.steps_left -= len(block)
+        if self.steps_left < 0:
+            self.charge_budget(block)
         for stmt in block:
             self.eval_stmt(stmt, env)
 
+    def charge_budget(self, block):
+        if self.budget is None:
+            self.steps_left = self.step_interval = sys.maxsize
+            return
+        used = self.step_interval - self.steps_left
+        self.budget.check(used, block[0].line if block else None)
+        self.steps_left = self.step_interval = self.budget.interval()
+
     def builtin_printline(self, args):
         for arg in args:
             print(arg, end=' ')
         print()
 
     def builtin_range(self, args):
-        if len(args) == 1:
-            return args[0]
-        else:
-            raise ValueError("range expects one argument")
+        return ffrange(*args)
 
 class BreakException(Exception):
     pass
@@ -168,9 +489,14 @@ class ReturnException(Exception):
         self.value = value
 
 class FuncDef:
-    def __init__(self, params, block):
+    def __init__(self, params, block, name='<func>'):
         self.params = params
         self.block = block
+        self.name = name
+        self.calls = 0
+        self.compiled = None  # Python function from the JIT, False if it gave up
+        self.arity = len(dict.fromkeys(params))
+        self.frames = []  # recycled call frames
 
 class FFLibilFun:
     def __init__(self, func):
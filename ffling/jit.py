@@ -0,0 +1,71 @@
+# Hot-function JIT: FFling functions that get called often are turned into
+# Python source with the transpiler, compile()d and called directly.
+
+import operator
+from runtime import FFTable, iterate, ffrange
+from transpiler import Transpiler, TranspileError, HELPERS
+
+JIT_THRESHOLD = 100
+
+class FunctionCompiler(Transpiler):
+    # Compiles a single function body. Names the function doesn't bind are
+    # looked up in the caller's Environment at run time, and calls pass the
+    # function's live locals along so callees still see FFling's dynamic
+    # scope.
+    def compile(self, func):
+        self.push_scope('func')
+        params = [self.bind(param) for param in func.params]
+        self.line(f"def compiled({', '.join(['env'] + params + ['*_'])}):")
+        self.nested(func.block)
+        self.pop_scope()
+        return '\n'.join(self.lines) + '\n'
+
+    def free_name(self, name):
+        return f"lookup(env, {name!r})"
+
+    def call_expr(self, node):
+        callee = self.resolve(node.callee)
+        args = ', '.join(self.expr(arg) for arg in node.args)
+        return f"invoke({node.callee!r}, {callee}, [{args}], env, {self.frame()})"
+
+    def frame(self):
+        # The Environment a callee would have seen under the tree-walker
+        entries = {}
+        scope = self.scope
+        while scope is not None:
+            if scope.maybe:
+                raise TranspileError("call while some locals are only bound on some paths")
+            for name in scope.definite:
+                entries.setdefault(name, scope.py_name(name))
+            if scope.kind == 'func':
+                break
+            scope = scope.parent
+        return '{' + ', '.join(f"{name!r}: {py_name}" for name, py_name in entries.items()) + '}'
+
+class JIT:
+    def __init__(self, interpreter):
+        self.stats = {'compiled': 0, 'deopts': 0, 'compiled_calls': 0}
+        self.namespace = {
+            'FFTable': FFTable,
+            'iterate': iterate,
+            'ffrange': ffrange,
+            'operator': operator,
+            'lookup': interpreter.lookup,
+            'invoke': interpreter.invoke,
+        }
+        exec(HELPERS, self.namespace)
+
+    def compile(self, func):
+        # Leaves func.compiled as False when the generator can't handle the
+        # body, so the tree-walker keeps running it
+        try:
+            source = FunctionCompiler().compile(func)
+            code = compile(source, f"<jit {func.name}>", 'exec')
+        except (TranspileError, SyntaxError, RecursionError):
+            func.compiled = False
+            self.stats['deopts'] += 1
+            return
+        namespace = dict(self.namespace)
+        exec(code, namespace)
+        func.compiled = namespace['compiled']
+        self.stats['compiled'] += 1
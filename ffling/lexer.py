@@ -1,6 +1,8 @@
 import re
 
 class Token:
+    __slots__ = ('type', 'value', 'line')
+
     def __init__(self, type, value, line):
         self.type = type
         self.value = value
@@ -9,14 +11,78 @@ class Token:
     def __repr__(self):
         return f'Token({self.type}, {repr(self.value)}, line {self.line})'
 
+KEYWORDS = {
+    'local': 'LOCAL',
+    'printline': 'PRINTLINE',
+    'printlinef': 'PRINTLINEF',
+    'import': 'IMPORT',
+    'for': 'FOR',
+    'in': 'IN',
+    'range': 'RANGE',
+    'if': 'IF',
+    'elif': 'ELIF',
+    'else': 'ELSE',
+    'while': 'WHILE',
+    'break': 'BREAK',
+    'continue': 'CONTINUE',
+    'func': 'FUNC',
+    'return': 'RETURN',
+    'True': 'TRUE',
+    'False': 'FALSE',
+    'table': 'TABLE',
+    'and': 'AND',
+    'or': 'OR',
+    'not': 'NOT',
+    'pass': 'PASS',
+    'const': 'CONST',
+    'try': 'TRY',
+    'catch': 'CATCH',
+    'class': 'CLASS',
+    'new': 'NEW',
+    'this': 'THIS',
+    'null': 'NULL',
+    'nil': 'NIL',
+    'assert': 'ASSERT'
+}
+
+OPERATORS = {'=': 'ASSIGN', '==': 'EQ', '>': 'GT', '<': 'LT', '+': 'PLUS', '-': 'MINUS', '*': 'MUL', '/': 'DIV', '%': 'MOD', '(': 'LPAREN', ')': 'RPAREN', ':': 'COLON', ',': 'COMMA', '{': 'LBRACKET', '}': 'RBRACKET', '[': 'LSQUARE', ']': 'RSQUARE', '.': 'DOT', '#': 'LEN'}
+OPERATOR_BYTES = {op.encode(): (tok_type, op) for op, tok_type in OPERATORS.items()}
+
+# The lexer works on bytes (or an mmap of the file) and only decodes
+# identifiers and string literals. Non-ASCII bytes are allowed in names.
+TOKEN_RE = re.compile(rb'''
+    (?P<space>\s+)
+  | (?P<string>"[^"]*")
+  | (?P<number>[0-9]+)
+  | (?P<name>[A-Za-z_\x80-\xff][A-Za-z0-9_\x80-\xff]*)
+  | (?P<op>==|[=><+\-*/%():,{}\[\].\#])
+''', re.VERBOSE)
+INDENT_RE = re.compile(rb'[ \x0b\x0c]*')
+
 class Lexer:
     def __init__(self, code):
+        if isinstance(code, str):
+            code = code.encode('utf-8')
         self.code = code
         self.pos = 0
         self.line = 1
         self.tokens = []
         self.indent_stack = [0]  # Start with 0 indent
 
+    @classmethod
+    def tokenize_file(cls, filename):
+        # Lex straight from an mmap so the source is never copied into a str
+        import mmap
+        with open(filename, 'rb') as file:
+            try:
+                code = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                return cls(b'').tokenize()
+        try:
+            return cls(code).tokenize()
+        finally:
+            code.close()
+
     def advance(self):
         self.pos += 1
 
@@ -26,11 +92,22 @@ class Lexer:
         return None
 
     def tokenize(self):
-        lines = self.code.splitlines(keepends=True)
-        for line_num, line in enumerate(lines, 1):
+        code = self.code
+        size = len(code)
+        match = TOKEN_RE.match
+        tokens = self.tokens
+        pos = 0
+        line_num = 0
+        while pos < size:
+            line_num += 1
             self.line = line_num
-            stripped = line.rstrip('\r\n')
-            indent_len = self.get_indent_len(stripped)
+            end = code.find(b'\n', pos)
+            next_pos = end + 1
+            if end == -1:
+                end = next_pos = size
+            while end > pos and code[end - 1] == 13:  # Strip \r
+                end -= 1
+            indent_len = INDENT_RE.match(code, pos, end).end() - pos
             dedents_needed = 0
             # Handle dedents
             while self.indent_stack and indent_len < self.indent_stack[-1]:
@@ -38,103 +115,36 @@ class Lexer:
                 dedents_needed += 1
             # Handle indents
             if indent_len > self.indent_stack[-1]:
-                self.tokens.append(Token('INDENT', '', self.line))
+                tokens.append(Token('INDENT', '', line_num))
                 self.indent_stack.append(indent_len)
             # Add dedents
             for _ in range(dedents_needed):
-                self.tokens.append(Token('DEDENT', '', self.line))
+                tokens.append(Token('DEDENT', '', line_num))
 
-            # Tokenize the stripped line, skipping initial spaces
-            i = indent_len + (stripped[indent_len:] != '' and stripped[indent_len] == ' ')
-            while i < len(stripped):
-                char = stripped[i]
-                if char.isspace():
-                    i += 1
-                    continue
-                if char == '"':
-                    start = i
-                    i += 1
-                    while i < len(stripped) and stripped[i] != '"':
-                        i += 1
-                    if i >= len(stripped):
-                        raise SyntaxError(f"String not terminated, line {self.line}")
-                    value = stripped[start+1:i]
-                    self.tokens.append(Token('STRING', value, self.line))
-                    i += 1
-                    continue
-                if char.isdigit():
-                    start = i
-                    while i < len(stripped) and stripped[i].isdigit():
-                        i += 1
-                    value = int(stripped[start:i])
-                    self.tokens.append(Token('NUMBER', value, self.line))
-                    continue
-                if char.isalpha() or char == '_':
-                    start = i
-                    while i < len(stripped) and (stripped[i].isalnum() or stripped[i] == '_'):
-                        i += 1
-                    value = stripped[start:i]
-                    keyword_tokens = {
-                        'local': 'LOCAL',
-                        'printline': 'PRINTLINE',
-                        'printlinef': 'PRINTLINEF',
-                        'import': 'IMPORT',
-                        'for': 'FOR',
-                        'in': 'IN',
-                        'range': 'RANGE',
-                        'if': 'IF',
-                        'elif': 'ELIF',
-                        'else': 'ELSE',
-                        'while': 'WHILE',
-                        'break': 'BREAK',
-                        'continue': 'CONTINUE',
-                        'func': 'FUNC',
-                        'return': 'RETURN',
-                        'True': 'TRUE',
-                        'False': 'FALSE',
-                        'table': 'TABLE',
-                        'and': 'AND',
-                        'or': 'OR',
-                        'not': 'NOT',
-                        'pass': 'PASS',
-                        'const': 'CONST',
-                        'try': 'TRY',
-                        'catch': 'CATCH',
-                        'class': 'CLASS',
-                        'new': 'NEW',
-                        'this': 'THIS',
-                        'null': 'NULL',
-                        'nil': 'NIL',
-                        'assert': 'ASSERT'
-                    }
-                    token_type = keyword_tokens.get(value, 'IDENTIFIER')
-                    self.tokens.append(Token(token_type, value, self.line))
-                    continue
-                # Operators and punctuation (single char for simplicity)
-                ops = {'=': 'ASSIGN', '==': 'EQ', '>': 'GT', '<': 'LT', '+': 'PLUS', '-': 'MINUS', '*': 'MUL', '/': 'DIV', '%': 'MOD', '(': 'LPAREN', ')': 'RPAREN', ':': 'COLON', ',': 'COMMA', '{': 'LBRACKET', '}': 'RBRACKET', '[': 'LSQUARE', ']': 'RSQUARE', '.': 'DOT'}
-                found = False
-                for op_len in [2,1]:
-                    if i + op_len <= len(stripped) and stripped[i:i+op_len] in ops:
-                        tok = Token(ops[stripped[i:i+op_len]], stripped[i:i+op_len], self.line)
-                        self.tokens.append(tok)
-                        i += op_len
-                        found = True
-                        break
-                if found:
-                    continue
-                raise SyntaxError(f"Unknown character '{char}', line {self.line}")
-            # Newline implicit EOL, but since blocks, no need
+            i = pos + indent_len
+            while i < end:
+                m = match(code, i, end)
+                if m is None:
+                    if code[i] == 34:  # '"'
+                        raise SyntaxError(f"String not terminated, line {line_num}")
+                    char = bytes(code[i:i + 4]).decode('utf-8', 'replace')[0]
+                    raise SyntaxError(f"Unknown character '{char}', line {line_num}")
+                kind = m.lastgroup
+                if kind == 'name':
+                    value = m.group().decode('utf-8')
+                    tokens.append(Token(KEYWORDS.get(value, 'IDENTIFIER'), value, line_num))
+                elif kind == 'op':
+                    tok_type, value = OPERATOR_BYTES[m.group()]
+                    tokens.append(Token(tok_type, value, line_num))
+                elif kind == 'number':
+                    tokens.append(Token('NUMBER', int(m.group()), line_num))
+                elif kind == 'string':
+                    tokens.append(Token('STRING', m.group()[1:-1].decode('utf-8'), line_num))
+                i = m.end()
+            pos = next_pos
         # Close all indents with dedents
         while len(self.indent_stack) > 1:
             self.indent_stack.pop()
-            self.tokens.append(Token('DEDENT', '', self.line))
-        self.tokens.append(Token('EOF', None, self.line))
-        return self.tokens
-
-    def get_indent_len(self, line):
-        i = 0
-        while i < len(line) and line[i].isspace() and line[i] != '\t':  # Assume spaces only
-            i += 1
-        if '\t' in line[:i]:
-            raise SyntaxError(f"Tabs not allowed, line {self.line}")
-        return i
+            tokens.append(Token('DEDENT', '', self.line))
+        tokens.append(Token('EOF', None, self.line))
+        return tokens
@@ -3,29 +3,91 @@ import sys
 from lexer import Lexer
 from parser_ll import Parser
 from interpreter import Interpreter
+from budget import Budget, BudgetExceeded, LIMIT_FLAGS
 
 def main():
-    if len(sys.argv) != 2:
-        print("Kullanım: python main.py <ffling_dosya>")
+    # Options go before the file name; everything after it is the script's
+    mem_report = False
+    limits = {}
+    while len(sys.argv) > 1 and (sys.argv[1] == '--mem-report' or sys.argv[1] in LIMIT_FLAGS):
+        flag = sys.argv.pop(1)
+        if flag == '--mem-report':
+            mem_report = True
+            continue
+        name, convert = LIMIT_FLAGS[flag]
+        try:
+            limits[name] = convert(sys.argv.pop(1))
+        except (IndexError, ValueError):
+            print(f"Geçersiz değer: {flag}")
+            sys.exit(1)
+
+    if len(sys.argv) < 2:
+        print("Kullanım: python main.py [seçenekler] <ffling_dosya> [argümanlar...]")
+        print("          seçenekler: --mem-report --max-steps N --max-time saniye --max-memory MB")
+        print("          python main.py serve [soket_yolu]")
+        print("          python main.py batch [-j N] [--out klasör] [--max-steps N ...] <dosyalar...>")
+        print("          python main.py transpile <ffling_dosya> [-o çıktı.py]")
+        print("          python main.py conformance <dosyalar...>")
         sys.exit(1)
 
+    if sys.argv[1] == 'serve':
+        from server import serve, DEFAULT_SOCKET
+        serve(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOCKET)
+        return
+
+    if sys.argv[1] == 'batch':
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    if sys.argv[1] == 'transpile':
+        from transpiler import main as transpile_main
+        sys.exit(transpile_main(sys.argv[2:]))
+
+    if sys.argv[1] == 'conformance':
+        from transpiler import conformance
+        sys.exit(conformance(sys.argv[2:]))
+
     filename = sys.argv[1]
+    interpreter = Interpreter(sys.argv[2:])
+    if limits:
+        interpreter.set_budget(Budget(**limits))
+    if mem_report:
+        sys.exit(run_with_mem_report(interpreter, filename))
+
     try:
-        with open(filename, 'r') as file:
-            code = file.read()
+        tokens = Lexer.tokenize_file(filename)
     except FileNotFoundError:
         print(f"Dosya bulunamadı: {filename}")
         sys.exit(1)
 
-    # Lexer, Parser, Interpreter kullanarak kodu çalıştır
-    lexer = Lexer(code)
-    tokens = lexer.tokenize()
-
     parser = Parser(tokens)
     ast = parser.parse()
 
-    interpreter = Interpreter()
-    interpreter.execute(ast)
+    try:
+        interpreter.execute(ast)
+    except BudgetExceeded as e:
+        print(f"Runtime Error: {e}")
+        sys.exit(1)
+
+def run_with_mem_report(interpreter, filename):
+    from memory import MemoryTracker
+    try:
+        with open(filename, encoding='utf-8') as f:
+            source = f.read()
+    except FileNotFoundError:
+        print(f"Dosya bulunamadı: {filename}")
+        return 1
+    tracker = MemoryTracker()
+    tracker.start()
+    tracker.attach(interpreter)
+    try:
+        tracker.run(source, lambda: Lexer.tokenize_file(filename))
+    except BudgetExceeded as e:
+        print(f"Runtime Error: {e}")
+        return 1
+    finally:
+        tracker.report(sys.stderr)
+    return 0
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+# Memory accounting for `main.py --mem-report` and :stats memory. Built on
+# tracemalloc, so it only sees what is allocated while tracking is on.
+
+import gc
+import sys
+import tracemalloc
+from collections import Counter
+from parser_ll import Parser
+from runtime import FFTable, StringBuilder
+from interpreter import Environment
+
+TOP_LINES = 10
+
+class MemoryTracker:
+    def __init__(self):
+        self.phases = {}
+        # Memory still held after each FFling statement ran, not counting
+        # what the statements nested in it kept, keyed by (source, line)
+        self.lines = Counter()
+        self.sources = []
+        self.nested = 0
+        self.interpreter = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        self.detach()
+        tracemalloc.stop()
+
+    def attach(self, interpreter):
+        # Wraps eval_stmt on this one interpreter; the class is untouched so
+        # untracked interpreters pay nothing
+        eval_stmt = interpreter.eval_stmt
+        traced = tracemalloc.get_traced_memory
+
+        def measured_eval_stmt(stmt, env):
+            start = traced()[0]
+            outer = self.nested
+            self.nested = 0
+            try:
+                return eval_stmt(stmt, env)
+            finally:
+                grown = traced()[0] - start
+                self.lines[len(self.sources) - 1, stmt.line] += grown - self.nested
+                self.nested = outer + grown
+
+        interpreter.eval_stmt = measured_eval_stmt
+        self.interpreter = interpreter
+
+    def detach(self):
+        if self.interpreter is not None:
+            del self.interpreter.eval_stmt
+            self.interpreter = None
+
+    def phase(self, name, func, *args):
+        # Records traced memory when func returns and the peak while it ran
+        tracemalloc.reset_peak()
+        try:
+            return func(*args)
+        finally:
+            self.phases[name] = tracemalloc.get_traced_memory()
+
+    def run(self, source, tokenize):
+        self.sources.append(source.splitlines())
+        tokens = self.phase('lex', tokenize)
+        program = self.phase('parse', lambda: Parser(tokens).parse())
+        self.phase('execute', self.interpreter.execute, program)
+
+    def report(self, file=sys.stdout):
+        print("Memory report:", file=file)
+        print(f"  {'Phase':<9} {'Current(KB)':>12} {'Peak(KB)':>10}", file=file)
+        for name, (current, peak) in self.phases.items():
+            print(f"  {name:<9} {current / 1024:>12.1f} {peak / 1024:>10.1f}", file=file)
+
+        environments, tables = live_objects()
+        strings, string_bytes = held_strings(self.interpreter.glob_env)
+        stats = self.interpreter.frame_stats
+        print(f"  Live environments: {environments} ({stats['allocated']} call frames allocated, {stats['reused']} reused)", file=file)
+        print(f"  Live tables:       {tables}", file=file)
+        print(f"  Strings in globals and tables: {strings} ({string_bytes / 1024:.1f} KB)", file=file)
+
+        top = [(key, size) for key, size in self.lines.most_common(TOP_LINES) if size > 0]
+        if top:
+            print("  Top lines by memory kept:", file=file)
+        for (source, line), size in top:
+            lines = self.sources[source]
+            text = lines[line - 1].strip() if line and line <= len(lines) else ''
+            print(f"    line {line}: {size / 1024:.1f} KB  {text}", file=file)
+
+def live_objects():
+    environments = tables = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, Environment):
+            environments += 1
+        elif isinstance(obj, FFTable):
+            tables += 1
+    return environments, tables
+
+def held_strings(env):
+    # Strings reachable from the globals, through tables but not into
+    # snapshot tables that haven't been loaded yet
+    count = size = 0
+    seen = set()
+    pending = list(env.vars.values())
+    while pending:
+        value = pending.pop()
+        if type(value) is StringBuilder:
+            value = value.build()
+        if type(value) is str:
+            count += 1
+            size += sys.getsizeof(value)
+        elif isinstance(value, FFTable) and id(value) not in seen and 'array' in vars(value):
+            seen.add(id(value))
+            pending.extend(value.array)
+            pending.extend(value.hash.keys())
+            pending.extend(value.hash.values())
+    return count, size
@@ -24,6 +24,12 @@ class Parser:
         return Program(statements)
 
     def parse_statement(self):
+        line = self.current_tok.line
+        stmt = self.parse_bare_statement()
+        stmt.line = line
+        return stmt
+
+    def parse_bare_statement(self):
         if self.current_tok.type == 'LOCAL':
             return self.parse_assignment()
         elif self.current_tok.type == 'PRINTLINE':
@@ -52,7 +58,14 @@ class Parser:
             return self.parse_import()
         else:
             # Function call or other
-            return self.parse_expression()
+            expr = self.parse_expression()
+            if self.current_tok and self.current_tok.type == 'ASSIGN':
+                if not isinstance(expr, Index):
+                    self.error("Invalid assignment target")
+                self.advance()
+                value = self.parse_expression()
+                return IndexAssign(expr.obj, expr.key, value)
+            return expr
 
     def parse_assignment(self):
         self.expect('LOCAL')
@@ -102,13 +115,18 @@ class Parser:
         self.expect('FOR')
         var = self.expect('IDENTIFIER')
         self.expect('IN')
+        if self.current_tok.type != 'RANGE':
+            iterable = self.parse_expression()
+            self.expect('COLON')
+            block = self.parse_block()
+            return ForEach(var.value, iterable, block)
         self.expect('RANGE')
-        self.expect('LPAREN')
-        range_arg = self.parse_expression()
-        self.expect('RPAREN')
+        range_args = self.parse_call('range').args
+        if not 1 <= len(range_args) <= 3:
+            self.error("range expects one to three arguments")
         self.expect('COLON')
         block = self.parse_block()
-        return For(var.value, range_arg, block)
+        return For(var.value, range_args, block)
 
     def parse_while(self):
         self.expect('WHILE')
@@ -145,17 +163,25 @@ class Parser:
         self.expect('TABLE')
         name = self.expect('IDENTIFIER')
         self.expect('ASSIGN')
+        return Assignment(name.value, self.parse_table_literal())
+
+    def parse_table_literal(self):
         self.expect('LBRACKET')
         pairs = {}
+        items = []
         while self.current_tok.type != 'RBRACKET':
-            key = self.expect('STRING')
-            self.expect('COLON')
-            value = self.parse_expression()
-            pairs[key.value] = value
+            entry = self.parse_expression()
+            if self.current_tok.type == 'COLON':
+                if not isinstance(entry, Literal):
+                    self.error("Table key must be a string or number")
+                self.advance()
+                pairs[entry.value] = self.parse_expression()
+            else:
+                items.append(entry)
             if self.current_tok.type == 'COMMA':
                 self.advance()
         self.expect('RBRACKET')
-        return Assignment(name.value, Table(pairs))
+        return Table(pairs, items)
 
     def parse_import(self):
         self.expect('IMPORT')
@@ -198,6 +224,17 @@ class Parser:
         return left
 
     def parse_term(self):
+        tok = self.current_tok
+        if tok.type == 'LEN':
+            self.advance()
+            return UnaryOp('LEN', self.parse_term())
+        if tok.type == 'NOT':
+            # Binds looser than comparisons, like Python: not a == b
+            self.advance()
+            return UnaryOp('NOT', self.parse_binop())
+        return self.parse_postfix(self.parse_atom())
+
+    def parse_atom(self):
         tok = self.current_tok
         if tok.type == 'NUMBER':
             self.advance()
@@ -213,15 +250,35 @@ class Parser:
                 return Variable(tok.value)
         elif tok.type in ('TRUE', 'FALSE'):
             self.advance()
-            return Literal(tok.value == 'TRUE')
+            return Literal(tok.type == 'TRUE')
         elif tok.type == 'LPAREN':
             self.advance()
             expr = self.parse_expression()
             self.expect('RPAREN')
             return expr
+        elif tok.type == 'LBRACKET':
+            return self.parse_table_literal()
+        elif tok.type == 'RANGE':
+            self.advance()
+            return self.parse_call('range')
         else:
             self.error("Expression expected")
 
+    def parse_postfix(self, expr):
+        while self.current_tok:
+            if self.current_tok.type == 'LSQUARE':
+                self.advance()
+                key = self.parse_expression()
+                self.expect('RSQUARE')
+                expr = Index(expr, key)
+            elif self.current_tok.type == 'DOT':
+                self.advance()
+                name = self.expect('IDENTIFIER')
+                expr = Index(expr, Literal(name.value))
+            else:
+                break
+        return expr
+
     def parse_call(self, name):
         self.expect('LPAREN')
         args = []
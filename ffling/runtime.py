@@ -0,0 +1,114 @@
+# Runtime values shared by the interpreter and transpiled programs.
+# Only uses the standard library so the transpiler can embed this file
+# verbatim in generated modules.
+
+import sys
+import reprlib
+import itertools
+from collections.abc import Iterator
+
+class FFTable:
+    # Lua-style table: consecutive integer keys starting at 0 live in a dense
+    # list, everything else goes to a dict.
+    def __init__(self, array=None, hash=None):
+        self.array = array if array is not None else []
+        self.hash = hash if hash is not None else {}
+
+    def get(self, key):
+        if type(key) is int:
+            if 0 <= key < len(self.array):
+                return self.array[key]
+        elif type(key) is float and key.is_integer():
+            # 2.0 and 2 are the same key, as in Lua
+            return self.get(int(key))
+        value = self.hash.get(key)
+        if type(value) is StringBuilder:
+            return value.build()
+        return value
+
+    def set(self, key, value):
+        if type(key) is float and key.is_integer():
+            key = int(key)
+        if type(key) is int:
+            n = len(self.array)
+            if 0 <= key < n:
+                self.array[key] = value
+                return
+            if key == n:
+                self.array.append(value)
+                self.migrate()
+                return
+        self.hash[key] = value
+
+    def migrate(self):
+        # Pull keys that became consecutive out of the hash part
+        n = len(self.array)
+        while n in self.hash:
+            self.array.append(self.hash.pop(n))
+            n += 1
+
+    def keys(self):
+        # The keys there were when the walk started; a loop body may add more
+        return itertools.chain(range(len(self.array)), list(self.hash))
+
+    __getitem__ = get
+    __setitem__ = set
+    __iter__ = keys
+
+    def __len__(self):
+        return len(self.array)
+
+    @reprlib.recursive_repr('{...}')
+    def __repr__(self):
+        parts = [repr(v) for v in self.array]
+        parts += [f"{k!r}: {v!r}" for k, v in self.hash.items()]
+        return '{' + ', '.join(parts) + '}'
+
+class StringBuilder:
+    # Only ever lives in an Environment slot or under a string key of a
+    # table's hash part; reading either joins the pieces, so scripts never
+    # see anything but a plain str.
+    def __init__(self, initial=''):
+        self.parts = [initial] if initial else []
+
+    def extend(self, pieces):
+        self.parts.extend(pieces)
+
+    def build(self):
+        if len(self.parts) != 1:
+            self.parts[:] = [''.join(self.parts)]
+        return self.parts[0]
+
+    def __str__(self):
+        return self.build()
+
+    def __repr__(self):
+        return repr(self.build())
+
+def iterate(value):
+    # What `for x in value:` walks over. Ranges and line streams are pulled
+    # one value at a time, never built up front.
+    if isinstance(value, FFTable):
+        return value.keys()
+    elif isinstance(value, (str, range, Iterator)):
+        return value
+    raise ValueError(f"Cannot iterate over {value}")
+
+def ffrange(*args):
+    if not 1 <= len(args) <= 3 or any(type(arg) is not int for arg in args):
+        raise ValueError("range expects one to three integers")
+    if len(args) == 3 and args[2] == 0:
+        raise ValueError("range step can't be zero")
+    return range(*args)
+
+def inputlines():
+    return (line.rstrip('\n') for line in sys.stdin)
+
+def filelines(path):
+    # Opened here so a missing file fails at the call
+    return read_lines(open(path, encoding='utf-8'))
+
+def read_lines(f):
+    with f:
+        for line in f:
+            yield line.rstrip('\n')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+FFling Server - keeps a warm interpreter process on a Unix socket
+"""
+
+import io
+import os
+import sys
+import json
+import signal
+import socket
+from interpreter import Interpreter
+from batch import load_program
+
+DEFAULT_SOCKET = os.environ.get('FFLING_SOCKET', '/tmp/ffling.sock')
+
+def send_message(conn, message):
+    conn.sendall((json.dumps(message) + '\n').encode('utf-8'))
+
+class SocketWriter(io.TextIOBase):
+    # Stands in for sys.stdout/sys.stderr in a request, one frame per line
+    def __init__(self, conn, stream):
+        self.conn = conn
+        self.stream = stream
+        self.buffer = []
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        self.buffer.append(s)
+        if '\n' in s:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self.buffer:
+            send_message(self.conn, {self.stream: ''.join(self.buffer)})
+            self.buffer = []
+
+class FFlingServer:
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.path = path
+
+    def serve_forever(self):
+        if not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'fork'):
+            print("Server mode needs Unix sockets and fork()")
+            sys.exit(1)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.listen(64)
+        # Children are reaped by the kernel
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        print(f"FFling server listening on {self.path}")
+        try:
+            while True:
+                conn, _ = sock.accept()
+                # Everything about a request, reading it included, happens in
+                # its own process, so a client that is slow to send only
+                # holds up itself
+                try:
+                    pid = os.fork()
+                except OSError as e:
+                    print(f"Request error: {e}")
+                    conn.close()
+                    continue
+                if pid == 0:
+                    # Whatever escapes, the child must never get back into
+                    # this loop or the finally below
+                    status = 1
+                    try:
+                        sock.close()
+                        status = self.handle(conn)
+                    except Exception as e:
+                        print(f"Request error: {e}", file=sys.__stdout__, flush=True)
+                    finally:
+                        os._exit(status)
+                conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+            os.unlink(self.path)
+
+    def handle(self, conn):
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        with conn.makefile('r', encoding='utf-8') as reader:
+            request = json.loads(reader.readline())
+        filename = request['path']
+        # Parsed programs come from the on-disk cache batch mode uses, which
+        # outlives this process and is shared by every other request
+        try:
+            ast = load_program(filename)
+        except FileNotFoundError:
+            send_message(conn, {'err': f"Dosya bulunamadı: {filename}\n"})
+            send_message(conn, {'exit': 1})
+            return 1
+        except SyntaxError as e:
+            send_message(conn, {'err': f"Syntax Error: {e}\n"})
+            send_message(conn, {'exit': 1})
+            return 1
+        return self.run(conn, ast, request)
+
+    def run(self, conn, ast, request):
+        stdout = SocketWriter(conn, 'out')
+        stderr = SocketWriter(conn, 'err')
+        sys.stdout = stdout
+        sys.stderr = stderr
+        sys.stdin = io.StringIO(request.get('stdin', ''))
+        status = 0
+        try:
+            os.chdir(request.get('cwd', os.getcwd()))
+            Interpreter(request.get('args', [])).execute(ast)
+        except Exception as e:
+            print(f"Runtime Error: {e}", file=stderr)
+            status = 1
+        try:
+            stdout.flush()
+            stderr.flush()
+            send_message(conn, {'exit': status})
+            conn.close()
+        except OSError:
+            pass
+        return status
+
+def serve(path=DEFAULT_SOCKET):
+    FFlingServer(path).serve_forever()
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET)
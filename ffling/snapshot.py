@@ -0,0 +1,347 @@
+# REPL session snapshots: the global Environment's user variables, tables
+# and functions written to a compact binary file.
+#
+# Layout, all integers are LEB128 varints unless noted:
+#   MAGIC
+#   <I n_strings, <I n_tables, <I n_funcs
+#   string offsets (n_strings + 1 x <I), then the UTF-8 blob
+#   table offsets (n_tables + 1 x <I), then one encoded body per table
+#   function bodies, one after another
+#   globals: count, then (name, value) pairs
+#
+# Strings are stored once and referenced by index. Tables and functions are
+# referenced by index too, which keeps shared and cyclic tables intact. Table
+# bodies are only decoded when the table is first used.
+
+import io
+import os
+import struct
+from ast import Node
+from runtime import FFTable, StringBuilder
+from interpreter import FuncDef
+
+MAGIC = b'FFSNAP\x02\n'
+OFFSET = struct.Struct('<I')
+HEADER = struct.Struct('<III')
+
+NONE, TRUE, FALSE, INT, FLOAT, STR, LIST, DICT, NODE, TABLE, FUNC, RANGE = range(12)
+FLOAT_FORMAT = struct.Struct('<d')
+
+# Node constructors are called with these fields again on load, so
+# interpreter caches on the nodes start out empty
+NODE_CLASSES = {cls.__name__: cls for cls in Node.__subclasses__()}
+NODE_FIELDS = {}
+for _name, _cls in NODE_CLASSES.items():
+    _code = _cls.__init__.__code__ if '__init__' in vars(_cls) else None
+    NODE_FIELDS[_name] = _code.co_varnames[1:_code.co_argcount] if _code else ()
+
+class SnapshotError(ValueError):
+    pass
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+class Writer:
+    def __init__(self):
+        self.strings = {}
+        self.tables = {}
+        self.table_list = []
+        self.funcs = {}
+        self.func_list = []
+        self.skipped = []
+
+    def string(self, s):
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+        return index
+
+    def value(self, out, value):
+        # Depth first with an explicit stack, since a long a + b + c chain
+        # is as many nodes deep as it has operators
+        pending = [value]
+        while pending:
+            value = pending.pop()
+            if type(value) is StringBuilder:
+                value = value.build()
+            if value is None:
+                out.append(NONE)
+            elif value is True:
+                out.append(TRUE)
+            elif value is False:
+                out.append(FALSE)
+            elif type(value) is int:
+                out.append(INT)
+                write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+            elif type(value) is float:
+                out.append(FLOAT)
+                out += FLOAT_FORMAT.pack(value)
+            elif type(value) is str:
+                out.append(STR)
+                write_varint(out, self.string(value))
+            elif isinstance(value, (list, tuple)):
+                out.append(LIST)
+                write_varint(out, len(value))
+                pending.extend(reversed(value))
+            elif isinstance(value, dict):
+                out.append(DICT)
+                write_varint(out, len(value))
+                for key, item in reversed(value.items()):
+                    pending.append(item)
+                    pending.append(key)
+            elif isinstance(value, Node):
+                name = type(value).__name__
+                out.append(NODE)
+                write_varint(out, self.string(name))
+                pending.append(value.line)
+                pending.extend(getattr(value, field) for field in reversed(NODE_FIELDS[name]))
+            elif isinstance(value, FFTable):
+                out.append(TABLE)
+                write_varint(out, self.register(value, self.tables, self.table_list))
+            elif isinstance(value, FuncDef):
+                out.append(FUNC)
+                write_varint(out, self.register(value, self.funcs, self.func_list))
+            elif isinstance(value, range):
+                out.append(RANGE)
+                pending += (value.step, value.stop, value.start)
+            else:
+                raise SnapshotError(f"Cannot snapshot {value!r}")
+
+    def register(self, obj, index, objects):
+        key = id(obj)
+        if key not in index:
+            index[key] = len(objects)
+            objects.append(obj)
+        return index[key]
+
+    def write(self, env, f):
+        globals_part = bytearray()
+        names = []
+        for name, value in env.vars.items():
+            # Builtins, library functions and args come with the interpreter
+            if name == 'args' or callable(value) and not isinstance(value, FuncDef):
+                continue
+            encoded = bytearray()
+            try:
+                self.value(encoded, value)
+            except SnapshotError:
+                self.skipped.append(name)
+                continue
+            entry = bytearray()
+            write_varint(entry, self.string(name))
+            names.append(entry + encoded)
+        write_varint(globals_part, len(names))
+        for entry in names:
+            globals_part += entry
+
+        # Tables and functions can pull in more of each other while they are
+        # being encoded, so keep going until both lists stop growing
+        table_parts = []
+        func_parts = bytearray()
+        done_funcs = 0
+        while len(table_parts) < len(self.table_list) or done_funcs < len(self.func_list):
+            while len(table_parts) < len(self.table_list):
+                table = self.table_list[len(table_parts)]
+                body = bytearray()
+                write_varint(body, len(table.array))
+                for item in table.array:
+                    self.value(body, item)
+                write_varint(body, len(table.hash))
+                for key, item in table.hash.items():
+                    self.value(body, key)
+                    self.value(body, item)
+                table_parts.append(body)
+            while done_funcs < len(self.func_list):
+                func = self.func_list[done_funcs]
+                self.value(func_parts, func.name)
+                self.value(func_parts, func.params)
+                self.value(func_parts, func.block)
+                done_funcs += 1
+
+        encoded = [s.encode('utf-8') for s in self.strings]
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(encoded), len(table_parts), len(self.func_list)))
+        for parts in (encoded, table_parts):
+            offset = 0
+            for part in parts:
+                f.write(OFFSET.pack(offset))
+                offset += len(part)
+            f.write(OFFSET.pack(offset))
+            for part in parts:
+                f.write(part)
+        f.write(func_parts)
+        f.write(globals_part)
+
+class LazyTable(FFTable):
+    # Stands in for an FFTable until its array or hash part is touched
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._index = index
+
+    def __getattr__(self, name):
+        if name not in ('array', 'hash'):
+            raise AttributeError(name)
+        self.array, self.hash = self._reader.table_body(self._index)
+        self._reader = None
+        return getattr(self, name)
+
+class Reader:
+    def __init__(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise SnapshotError("Not an FFling snapshot")
+        self.data = data
+        self.pos = len(MAGIC)
+        n_strings, n_tables, n_funcs = HEADER.unpack_from(data, self.pos)
+        self.pos += HEADER.size
+        self.string_offsets = self.pos
+        self.string_base = self.pos + (n_strings + 1) * OFFSET.size
+        self.string_cache = [None] * n_strings
+        self.pos = self.string_base + self.offset(self.string_offsets, n_strings)
+        self.table_offsets = self.pos
+        self.table_base = self.pos + (n_tables + 1) * OFFSET.size
+        self.pos = self.table_base + self.offset(self.table_offsets, n_tables)
+        self.tables = [LazyTable(self, i) for i in range(n_tables)]
+        # Function bodies are plain AST, so they never refer to a table or
+        # another function that hasn't been read yet
+        self.funcs = []
+        for _ in range(n_funcs):
+            name = self.value()
+            params = self.value()
+            self.funcs.append(FuncDef(params, self.value(), name))
+
+    def offset(self, base, index):
+        return OFFSET.unpack_from(self.data, base + index * OFFSET.size)[0]
+
+    def string(self, index):
+        s = self.string_cache[index]
+        if s is None:
+            start = self.string_base + self.offset(self.string_offsets, index)
+            end = self.string_base + self.offset(self.string_offsets, index + 1)
+            s = self.string_cache[index] = self.data[start:end].decode('utf-8')
+        return s
+
+    def varint(self):
+        data = self.data
+        pos = self.pos
+        byte = data[pos]
+        if byte < 0x80:
+            self.pos = pos + 1
+            return byte
+        n = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        self.pos = pos
+        return n
+
+    def value(self):
+        # Lists, dicts, nodes and ranges are collected on a stack and built
+        # once their last item is read, the mirror image of Writer.value
+        data = self.data
+        stack = []
+        while True:
+            tag = data[self.pos]
+            self.pos += 1
+            if tag == NONE:
+                value = None
+            elif tag == TRUE:
+                value = True
+            elif tag == FALSE:
+                value = False
+            elif tag == INT:
+                n = self.varint()
+                value = n >> 1 if not n & 1 else -((n + 1) >> 1)
+            elif tag == FLOAT:
+                value = FLOAT_FORMAT.unpack_from(data, self.pos)[0]
+                self.pos += FLOAT_FORMAT.size
+            elif tag == STR:
+                value = self.string(self.varint())
+            elif tag == TABLE:
+                value = self.tables[self.varint()]
+            elif tag == FUNC:
+                value = self.funcs[self.varint()]
+            elif tag == LIST or tag == DICT:
+                n = self.varint()
+                if n:
+                    stack.append((tag, n if tag == LIST else n * 2, [], None))
+                    continue
+                value = [] if tag == LIST else {}
+            elif tag == NODE:
+                name = self.string(self.varint())
+                stack.append((tag, len(NODE_FIELDS[name]) + 1, [], name))
+                continue
+            elif tag == RANGE:
+                stack.append((tag, 3, [], None))
+                continue
+            else:
+                raise SnapshotError(f"Corrupt snapshot (tag {tag} at {self.pos - 1})")
+            while stack:
+                tag, needed, items, name = stack[-1]
+                items.append(value)
+                if len(items) < needed:
+                    break
+                stack.pop()
+                if tag == LIST:
+                    value = items
+                elif tag == DICT:
+                    value = dict(zip(items[::2], items[1::2]))
+                elif tag == NODE:
+                    value = NODE_CLASSES[name](*items[:-1])
+                    value.line = items[-1]
+                else:
+                    value = range(*items)
+            else:
+                return value
+
+    def table_body(self, index):
+        saved = self.pos
+        self.pos = self.table_base + self.offset(self.table_offsets, index)
+        array = [self.value() for _ in range(self.varint())]
+        hash = {}
+        for _ in range(self.varint()):
+            key = self.value()
+            hash[key] = self.value()
+        self.pos = saved
+        return array, hash
+
+    def globals(self):
+        values = []
+        for _ in range(self.varint()):
+            name = self.string(self.varint())
+            values.append((name, self.value()))
+        return values
+
+def save(interpreter, filename):
+    # Returns the names that couldn't be written. Everything is encoded
+    # before the file is touched and then swapped in whole, so a failed
+    # save leaves the previous snapshot as it was.
+    writer = Writer()
+    data = io.BytesIO()
+    writer.write(interpreter.glob_env, data)
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data.getvalue())
+        os.replace(tmp, filename)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return writer.skipped
+
+def load(interpreter, filename):
+    # Binds the snapshot's globals into the interpreter, returns their names
+    with open(filename, 'rb') as f:
+        reader = Reader(f.read())
+    names = []
+    for name, value in reader.globals():
+        interpreter.bind(interpreter.glob_env, name, value)
+        names.append(name)
+    return names
@@ -9,16 +9,19 @@ import sys
 import subprocess
 from lexer import Lexer
 from parser_ll import Parser
-from interpreter import Interpreter
+from interpreter import Interpreter, MAX_DEOPTS
+import snapshot
+from history import History
 
 class FFlingTerminal:
     def __init__(self):
         self.interpreter = Interpreter()
-        self.history = []
+        self.history = History()
         self.current_code = ""
         self.prompt = "ffling> "
         self.multiline = False
         self.version = "1.0"
+        self.memory = None
         self.commands = {
             'help': self.cmd_help,
             'quit': self.cmd_quit,
@@ -43,6 +46,8 @@ class FFlingTerminal:
             'examples': self.cmd_examples,
             'search_history': self.cmd_search_history,
             'export_vars': self.cmd_export_vars,
+            'snapshot': self.cmd_snapshot,
+            'restore': self.cmd_restore,
             'import_code': self.cmd_import_code,
             'run_tests': self.cmd_run_tests,
             'stats': self.cmd_stats,
@@ -67,11 +72,12 @@ class FFlingTerminal:
                 line = line.strip()
                 if line.startswith(':'):
                     self.process_command(line[1:])
+                    self.history.add(line)
                 else:
-                    self.process_ffling(line)
-
-                if not self.multiline:
-                    self.history.append(line)
+                    # Continued lines are recorded once, as the whole entry
+                    code = self.process_ffling(line)
+                    if code:
+                        self.history.add(code)
             except KeyboardInterrupt:
                 print("\nUse :quit to exit.")
             except EOFError:
@@ -106,18 +112,19 @@ class FFlingTerminal:
         self.multiline = False
 
         try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            ast = parser.parse()
-            self.interpreter.execute(ast)
+            if self.memory:
+                self.memory.run(code, lambda: Lexer(code).tokenize())
+            else:
+                lexer = Lexer(code)
+                tokens = lexer.tokenize()
+                parser = Parser(tokens)
+                ast = parser.parse()
+                self.interpreter.execute(ast)
         except SyntaxError as e:
             print(f"Syntax Error: {e}")
         except Exception as e:
             print(f"Runtime Error: {e}")
-
-        if not self.multiline:
-            self.history.append(code)
+        return code
 
     # Commands (23 total)
 
@@ -146,9 +153,11 @@ FFling Terminal Commands (Package Manager Included):
   :examples <cat>          Show examples
   :search_history <query>  Search history
   :export_vars <file>      Export variables to file
+  :snapshot <file>         Save variables, tables and functions
+  :restore <file>          Restore a saved session
   :import_code <file>      Import code with imports
   :run_tests               Run basic tests
-  :stats                   Show session stats
+  :stats [specialization|jit|frames|memory [off]]  Show session stats
   :config <key> <val>      Set configuration
   :time_exec <code>        Time code execution
   :benchmark <n>           Run benchmark
@@ -166,7 +175,7 @@ FFling Terminal Commands (Package Manager Included):
             print(f"{i}: {repr(cmd)}")
 
     def cmd_clear_history(self, args):
-        self.history = []
+        self.history.clear()
         print("History cleared.")
 
     def cmd_goto(self, args):
@@ -311,6 +320,8 @@ FFling Terminal Commands (Package Manager Included):
 
     def cmd_reset(self, args):
         self.interpreter = Interpreter()
+        if self.memory:
+            self.memory.attach(self.interpreter)
         self.current_code = ""
         self.multiline = False
         print("Interpreter reset.")
@@ -319,7 +330,7 @@ FFling Terminal Commands (Package Manager Included):
         print("FFling Terminal Info:")
         print(f"Version: {self.version}")
         print(f"History size: {len(self.history)}")
-        print("Built-in libraries: time (time_time, time_sleep)")
+        print("Built-in libraries: time (time_time, time_sleep), bench (bench_run, bench_now)")
         print("Keywords: 30+")
 
     def cmd_tutorial(self, args):
@@ -361,18 +372,41 @@ if (True and False):
         if not args:
             print("Usage: :search_history <query>")
             return
-        query = args[0]
-        matches = [cmd for cmd in self.history if query in cmd]
-        for cmd in matches[-10:]:
+        for cmd in self.history.search(' '.join(args)):
             print(repr(cmd))
 
     def cmd_export_vars(self, args):
         if not args:
             print("Usage: :export_vars <file>")
             return
-        # Assume we can access env
-        # But for simplicity, not implemented fully
-        print("Export vars to", args[0])
+        self.cmd_snapshot(args)
+
+    def cmd_snapshot(self, args):
+        if not args:
+            print("Usage: :snapshot <file>")
+            return
+        try:
+            skipped = snapshot.save(self.interpreter, args[0])
+        except Exception as e:
+            print(f"Snapshot error: {e}")
+            return
+        print(f"Session saved to {args[0]}")
+        if skipped:
+            print(f"Not saved: {', '.join(skipped)}")
+
+    def cmd_restore(self, args):
+        if not args:
+            print("Usage: :restore <file>")
+            return
+        try:
+            names = snapshot.load(self.interpreter, args[0])
+        except FileNotFoundError:
+            print(f"File {args[0]} not found.")
+            return
+        except Exception as e:
+            print(f"Restore error: {e}")
+            return
+        print(f"Restored {len(names)} variables from {args[0]}")
 
     def cmd_import_code(self, args):
         if not args:
@@ -387,7 +421,53 @@ if (True and False):
         print("Tests completed.")
 
     def cmd_stats(self, args):
-        print(f"Session stats: {len(self.history)} commands executed.")
+        if args and args[0] == 'specialization':
+            stats = self.interpreter.quicken_stats
+            hot = self.interpreter.hot_binops
+            fast = sum(1 for node in hot if node.quick is not None)
+            given_up = sum(1 for node in hot if node.deopts >= MAX_DEOPTS)
+            ratio = fast / len(hot) * 100 if hot else 0.0
+            print("Specialization stats:")
+            print(f"  Quickened nodes: {stats['quickened']}")
+            print(f"  Deoptimizations: {stats['deopts']}")
+            print(f"  Hot nodes:       {len(hot)}")
+            print(f"  Specialized now: {fast} ({ratio:.1f}%)")
+            print(f"  Gave up:         {given_up}")
+            return
+        if args and args[0] == 'jit':
+            stats = self.interpreter.jit.stats
+            print("JIT stats:")
+            print(f"  Compiled functions: {stats['compiled']}")
+            print(f"  Deoptimizations:    {stats['deopts']}")
+            print(f"  Compiled calls:     {stats['compiled_calls']}")
+            return
+        if args and args[0] == 'memory':
+            self.cmd_stats_memory(args[1:])
+            return
+        if args and args[0] == 'frames':
+            stats = self.interpreter.frame_stats
+            total = stats['allocated'] + stats['reused']
+            ratio = stats['reused'] / total * 100 if total else 0.0
+            print("Call frame stats:")
+            print(f"  Allocated: {stats['allocated']}")
+            print(f"  Reused:    {stats['reused']} ({ratio:.1f}%)")
+            return
+        print(f"Session stats: {len(self.history)} commands in history.")
+
+    def cmd_stats_memory(self, args):
+        if args and args[0] == 'off':
+            if self.memory:
+                self.memory.stop()
+                self.memory = None
+            print("Memory tracking stopped.")
+        elif self.memory:
+            self.memory.report()
+        else:
+            from memory import MemoryTracker
+            self.memory = MemoryTracker()
+            self.memory.start()
+            self.memory.attach(self.interpreter)
+            print("Memory tracking started; run some code and use :stats memory again.")
 
     def cmd_config(self, args):
         if len(args) < 2:
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+FFling Transpiler - turns FFling programs into standalone Python modules
+"""
+
+import io
+import os
+import sys
+import difflib
+import hashlib
+import itertools
+from ast import *
+from lexer import Lexer
+from parser_ll import Parser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PY_OPS = {'PLUS': '+', 'MINUS': '-', 'MUL': '*', 'DIV': '/', 'MOD': '%', 'EQ': '==', 'GT': '>', 'LT': '<', 'AND': 'and', 'OR': 'or'}
+OPERATOR_FUNCS = {'PLUS': 'operator.add', 'MINUS': 'operator.sub', 'MUL': 'operator.mul', 'DIV': 'operator.truediv', 'MOD': 'operator.mod', 'EQ': 'operator.eq', 'GT': 'operator.gt', 'LT': 'operator.lt'}
+# FFling has no precedence, every chain runs left to right, so a left
+# operand needs parentheses wherever Python would bind it differently
+PY_PRECEDENCE = {'OR': 1, 'AND': 2, 'EQ': 3, 'GT': 3, 'LT': 3, 'PLUS': 4, 'MINUS': 4, 'MUL': 5, 'DIV': 5, 'MOD': 5}
+COMPARISONS = ('EQ', 'GT', 'LT')
+# Longer chains go through chain() so CPython's compiler doesn't recurse
+CHAIN_LIMIT = 200
+
+HELPERS = '''
+def printline(*args):
+    for arg in args:
+        print(arg, end=' ')
+    print()
+
+def inputline(*args):
+    return input()
+
+def table(items, pairs):
+    result = FFTable(items)
+    for key, value in pairs:
+        result.set(key, value)
+    return result
+
+def setindex(obj, key, value):
+    obj[key] = value
+
+def chain(value, *steps):
+    for op, operand in steps:
+        value = op(value, operand)
+    return value
+'''
+
+def py_name(name, suffix=''):
+    # Every FFling name gets a prefix: ff_ at module level, ff<scope id>_
+    # inside loops and functions. Nothing else in a generated module starts
+    # with ff_ or ff and a digit, so user names can't collide with each
+    # other, with the runtime or with Python's keywords and builtins.
+    return f"ff{suffix}_{name}"
+
+# What FFling code sees before it binds anything
+BUILTINS = {'printline': 'printline', 'printlinef': 'printline', 'inputline': 'inputline', 'inputlines': 'inputlines', 'filelines': 'filelines', 'range': 'ffrange'}
+
+PRELUDE = ('\nimport sys\nimport operator\n' + HELPERS + '\n'
+           + ''.join(f"{py_name(name)} = {value}\n" for name, value in BUILTINS.items())
+           + f"{py_name('args')} = FFTable(list(sys.argv[1:]))\n")
+
+class TranspileError(Exception):
+    pass
+
+class Scope:
+    def __init__(self, kind, parent=None, suffix=''):
+        self.kind = kind
+        self.parent = parent
+        self.suffix = suffix
+        self.definite = set()
+        self.maybe = set()
+
+    def py_name(self, name):
+        return py_name(name, self.suffix)
+
+class Transpiler:
+    # Loop iterations and calls get fresh FFling scopes, so every name bound
+    # outside module level is renamed per scope and reads are resolved
+    # statically. Anything that depends on FFling's dynamic scoping at run
+    # time raises TranspileError instead of producing different output.
+    def __init__(self):
+        self.lines = []
+        self.depth = 0
+        self.scope_ids = itertools.count(1)
+        self.module = Scope('module')
+        self.scope = self.module
+        self.dynamic = set()
+        self.loop_depth = 0
+
+    def transpile(self, program, source_name='<ffling>'):
+        self.dynamic = set()
+        try:
+            self.collect_scoped(program.statements, False)
+            self.emit_block(program.statements)
+        except RecursionError:
+            raise TranspileError("program is nested too deeply") from None
+        with open(os.path.join(HERE, 'runtime.py'), 'r') as f:
+            runtime = f.read()
+        header = f"# Generated by the FFling transpiler from {source_name}. Do not edit.\n"
+        return header + runtime + PRELUDE + '\n' + '\n'.join(self.lines) + '\n'
+
+    def collect_scoped(self, block, scoped):
+        # Every name that is ever bound somewhere other than module level
+        for stmt in block:
+            if isinstance(stmt, Assignment) and scoped:
+                self.dynamic.add(stmt.name)
+            elif isinstance(stmt, If):
+                self.collect_scoped(stmt.then_block, scoped)
+                for elif_part in stmt.elifs:
+                    self.collect_scoped(elif_part.block, scoped)
+                if stmt.else_block:
+                    self.collect_scoped(stmt.else_block, scoped)
+            elif isinstance(stmt, (For, ForEach)):
+                self.dynamic.add(stmt.var)
+                self.collect_scoped(stmt.block, True)
+            elif isinstance(stmt, While):
+                self.collect_scoped(stmt.block, True)
+            elif isinstance(stmt, Func):
+                self.dynamic.update(stmt.params)
+                self.collect_scoped(stmt.block, True)
+
+    def line(self, text):
+        self.lines.append('    ' * self.depth + text)
+
+    def emit_block(self, block):
+        start = len(self.lines)
+        for stmt in block:
+            self.emit_stmt(stmt)
+        if len(self.lines) == start:
+            self.line('pass')
+
+    def nested(self, block):
+        self.depth += 1
+        self.emit_block(block)
+        self.depth -= 1
+
+    def bind(self, name):
+        self.scope.definite.add(name)
+        return self.scope.py_name(name)
+
+    def resolve(self, name):
+        scope = self.scope
+        while scope is not None:
+            if name in scope.definite:
+                return scope.py_name(name)
+            if name in scope.maybe:
+                if scope.kind == 'module':
+                    return scope.py_name(name)
+                raise TranspileError(f"'{name}' is only bound on some paths")
+            if scope.kind == 'func':
+                return self.free_name(name)
+            scope = scope.parent
+        return self.module.py_name(name)
+
+    def free_name(self, name):
+        # A function reading a name it doesn't bind sees its caller's scope
+        if name in self.dynamic:
+            raise TranspileError(f"'{name}' depends on the caller's scope")
+        return self.module.py_name(name)
+
+    def push_scope(self, kind):
+        self.scope = Scope(kind, self.scope, str(next(self.scope_ids)))
+
+    def pop_scope(self):
+        self.scope = self.scope.parent
+
+    def emit_stmt(self, stmt):
+        if isinstance(stmt, Printline):
+            self.line(f"printline({', '.join(self.expr(arg) for arg in stmt.args)})")
+        elif isinstance(stmt, Assignment):
+            value = self.expr(stmt.value)
+            self.line(f"{self.bind(stmt.name)} = {value}")
+        elif isinstance(stmt, IndexAssign):
+            obj, key, value = self.expr(stmt.obj, True), self.expr(stmt.key), self.expr(stmt.value)
+            if self.has_call(stmt.value) and (self.has_call(stmt.obj) or self.has_call(stmt.key)):
+                # Keep FFling's object, key, value evaluation order
+                self.line(f"setindex({obj}, {key}, {value})")
+            else:
+                self.line(f"{obj}[{key}] = {value}")
+        elif isinstance(stmt, If):
+            self.emit_if(stmt)
+        elif isinstance(stmt, For):
+            bounds = ', '.join(self.expr(arg) for arg in stmt.range_args)
+            self.emit_loop(stmt.var, f"ffrange({bounds})", stmt.block)
+        elif isinstance(stmt, ForEach):
+            iterable = self.expr(stmt.iterable)
+            self.emit_loop(stmt.var, f"iterate({iterable})", stmt.block)
+        elif isinstance(stmt, While):
+            self.line(f"while {self.expr(stmt.condition)}:")
+            self.emit_loop(None, None, stmt.block)
+        elif isinstance(stmt, (Break, Continue)):
+            if not self.loop_depth:
+                raise TranspileError("break/continue outside a loop")
+            self.line('break' if isinstance(stmt, Break) else 'continue')
+        elif isinstance(stmt, Func):
+            self.emit_func(stmt)
+        elif isinstance(stmt, Return):
+            if not self.in_function():
+                raise TranspileError("return outside a function")
+            self.line(f"return {self.expr(stmt.value)}" if stmt.value else 'return None')
+        elif isinstance(stmt, Import):
+            self.emit_import(stmt)
+        else:
+            self.line(self.expr(stmt))
+
+    def in_function(self):
+        scope = self.scope
+        while scope is not None:
+            if scope.kind == 'func':
+                return True
+            scope = scope.parent
+        return False
+
+    def emit_if(self, stmt):
+        scope = self.scope
+        before = set(scope.definite)
+        results = []
+        branches = [('if', stmt.condition, stmt.then_block)]
+        branches += [('elif', part.condition, part.block) for part in stmt.elifs]
+        for word, condition, block in branches:
+            scope.definite = set(before)
+            self.line(f"{word} {self.expr(condition)}:")
+            self.nested(block)
+            results.append(scope.definite)
+        scope.definite = set(before)
+        if stmt.else_block:
+            self.line('else:')
+            self.nested(stmt.else_block)
+            results.append(scope.definite)
+        else:
+            results.append(before)
+        common = set.intersection(*results)
+        scope.maybe |= set.union(*results) - common
+        scope.definite = common
+
+    def emit_loop(self, var, iterable, block):
+        self.push_scope('loop')
+        if var is not None:
+            self.line(f"for {self.bind(var)} in {iterable}:")
+        self.loop_depth += 1
+        self.nested(block)
+        self.loop_depth -= 1
+        self.pop_scope()
+
+    def emit_func(self, stmt):
+        if self.scope is not self.module:
+            raise TranspileError(f"function {stmt.name} is not defined at the top level")
+        name = self.bind(stmt.name)
+        outer_loops = self.loop_depth
+        self.push_scope('func')
+        params = [self.bind(param) for param in stmt.params]
+        self.line(f"def {name}({', '.join(params + ['*_'])}):")
+        self.loop_depth = 0
+        self.nested(stmt.block)
+        self.loop_depth = outer_loops
+        self.pop_scope()
+
+    def emit_import(self, stmt):
+        if self.scope is not self.module:
+            raise TranspileError(f"import {stmt.path} is not at the top level")
+        if stmt.path == 'time':
+            self.line('import time')
+            self.line(f"def {self.bind('time_time')}(*args):")
+            self.line('    return time.time()')
+            self.line(f"def {self.bind('time_sleep')}(*args):")
+            self.line('    return time.sleep(args[0] if len(args) > 0 else 1)')
+        elif stmt.path == 'bench':
+            raise TranspileError("the bench library only runs in the interpreter")
+        else:
+            self.line('pass')
+
+    def expr(self, node, postfix=False):
+        if isinstance(node, Literal):
+            return repr(node.value)
+        elif isinstance(node, Variable):
+            return self.resolve(node.name)
+        elif isinstance(node, BinOp):
+            text = self.binop(node)
+            return f"({text})" if postfix else text
+        elif isinstance(node, UnaryOp):
+            operand = self.expr(node.operand, True)
+            if node.op == 'LEN':
+                return f"len({operand})"
+            return f"(not {operand})"
+        elif isinstance(node, Table):
+            items = ', '.join(self.expr(item) for item in node.items)
+            pairs = ''.join(f"({k!r}, {self.expr(v)}), " for k, v in node.pairs.items())
+            return f"table([{items}], [{pairs}])"
+        elif isinstance(node, Index):
+            return f"{self.expr(node.obj, True)}[{self.expr(node.key)}]"
+        elif isinstance(node, Call):
+            return self.call_expr(node)
+        raise TranspileError(f"Unknown expression {node}")
+
+    def call_expr(self, node):
+        callee = self.resolve(node.callee)
+        return f"{callee}({', '.join(self.expr(arg) for arg in node.args)})"
+
+    def binop(self, node):
+        spine = []
+        while isinstance(node, BinOp):
+            spine.append(node)
+            node = node.left
+        if len(spine) > CHAIN_LIMIT:
+            if any(op.op in ('AND', 'OR') for op in spine):
+                raise TranspileError("and/or chain too long")
+            steps = ', '.join(f"({OPERATOR_FUNCS[op.op]}, {self.operand(op.right)})" for op in reversed(spine))
+            return f"chain({self.expr(node)}, {steps})"
+        text = self.expr(node, True)
+        previous = None
+        for op in reversed(spine):
+            if previous is not None and (PY_PRECEDENCE[previous] < PY_PRECEDENCE[op.op] or (previous in COMPARISONS and op.op in COMPARISONS)):
+                text = f"({text})"
+            text = f"{text} {PY_OPS[op.op]} {self.operand(op.right)}"
+            previous = op.op
+        return text
+
+    def operand(self, node):
+        return self.expr(node, isinstance(node, (BinOp, UnaryOp)))
+
+    def has_call(self, node):
+        # Iterative for the same reason as binop: chains can be thousands deep
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Call):
+                return True
+            elif isinstance(node, BinOp):
+                pending += (node.left, node.right)
+            elif isinstance(node, UnaryOp):
+                pending.append(node.operand)
+            elif isinstance(node, Index):
+                pending += (node.obj, node.key)
+            elif isinstance(node, Table):
+                pending += node.items
+                pending += node.pairs.values()
+        return False
+
+def fingerprint():
+    digest = hashlib.sha1()
+    for name in ('transpiler.py', 'runtime.py', 'lexer.py', 'parser_ll.py', 'ast.py'):
+        with open(os.path.join(HERE, name), 'rb') as f:
+            digest.update(f.read())
+    return digest
+
+def transpile_file(filename, output=None):
+    # Regenerates only when the source or the transpiler changed
+    output = output or os.path.splitext(filename)[0] + '.py'
+    with open(filename, 'rb') as f:
+        source = f.read()
+    digest = fingerprint()
+    digest.update(source)
+    stamp = f"# ffling-stamp: {digest.hexdigest()}\n"
+    try:
+        with open(output, 'r') as f:
+            f.readline()
+            if f.readline() == stamp:
+                return output, False
+    except OSError:
+        pass
+    program = Parser(Lexer(source).tokenize()).parse()
+    code = Transpiler().transpile(program, os.path.basename(filename))
+    header, rest = code.split('\n', 1)
+    with open(output, 'w') as f:
+        f.write(header + '\n' + stamp + rest)
+    return output, True
+
+def capture(run):
+    output = io.StringIO()
+    old_stdout, old_stdin = sys.stdout, sys.stdin
+    sys.stdout = output
+    sys.stdin = io.StringIO('')
+    error = None
+    try:
+        run()
+    except Exception as e:
+        error = e
+    finally:
+        sys.stdout, sys.stdin = old_stdout, old_stdin
+    return output.getvalue(), error
+
+def check_conformance(filename):
+    # Runs one file interpreted and transpiled; returns (status, detail)
+    from interpreter import Interpreter
+    with open(filename, 'rb') as f:
+        source = f.read()
+    try:
+        program = Parser(Lexer(source).tokenize()).parse()
+    except SyntaxError as e:
+        return 'skip', f"syntax error: {e}"
+    except RecursionError:
+        return 'skip', "nested too deeply to parse"
+    try:
+        code = Transpiler().transpile(program, os.path.basename(filename))
+        compiled = compile(code, filename + '.py', 'exec')
+    except TranspileError as e:
+        return 'skip', str(e)
+    except RecursionError:
+        return 'skip', "generated code is nested too deeply to compile"
+    expected, expected_error = capture(lambda: Interpreter().execute(program))
+    old_argv = sys.argv
+    sys.argv = [filename]
+    try:
+        actual, actual_error = capture(lambda: exec(compiled, {'__name__': '__main__'}))
+    finally:
+        sys.argv = old_argv
+    if expected == actual and (expected_error is None) == (actual_error is None):
+        return 'pass', None
+    diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), 'interpreted', 'transpiled', lineterm='')
+    detail = '\n'.join(diff)
+    if (expected_error is None) != (actual_error is None):
+        detail += f"\ninterpreter error: {expected_error!r}\ntranspiled error: {actual_error!r}"
+    return 'fail', detail
+
+def conformance(argv):
+    from batch import expand
+    files = expand(argv)
+    if not files:
+        print("No FFling files found")
+        return 1
+    counts = {'pass': 0, 'fail': 0, 'skip': 0}
+    for filename in files:
+        status, detail = check_conformance(filename)
+        counts[status] += 1
+        print(f"{status.upper():<5} {filename}")
+        if detail:
+            for line in detail.splitlines():
+                print(f"    {line}")
+    print(f"\n{counts['pass']} passed, {counts['fail']} failed, {counts['skip']} skipped")
+    return 1 if counts['fail'] else 0
+
+def main(argv):
+    if not argv:
+        print("Kullanım: python main.py transpile <ffling_dosya> [-o çıktı.py]")
+        return 1
+    output = None
+    if '-o' in argv:
+        i = argv.index('-o')
+        output = argv[i + 1] if i + 1 < len(argv) else None
+        argv = argv[:i] + argv[i + 2:]
+    try:
+        path, written = transpile_file(argv[0], output)
+    except FileNotFoundError:
+        print(f"Dosya bulunamadı: {argv[0]}")
+        return 1
+    except (SyntaxError, TranspileError) as e:
+        print(f"Transpile error: {e}")
+        return 1
+    print(f"Wrote {path}" if written else f"{path} is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
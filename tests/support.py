@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FFLING = os.path.join(ROOT, 'ffling')
+EXAMPLES = os.path.join(ROOT, 'examples')
+
+# The FFling modules import its own ast.py as `ast`, which clashes with the
+# stdlib module the test runner has already loaded. Load them against
+# ffling/ast.py, then put the stdlib one back for everything else.
+sys.path.insert(0, FFLING)
+stdlib_ast = sys.modules.pop('ast', None)
+try:
+    from lexer import Lexer
+    from parser_ll import Parser
+    from interpreter import Interpreter, FuncDef
+    from runtime import FFTable
+    from budget import Budget, BudgetExceeded
+    from history import History
+    import history
+    import snapshot
+finally:
+    if stdlib_ast is not None:
+        sys.modules['ast'] = stdlib_ast
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+def run(source, interpreter=None):
+    # Runs source and returns the interpreter and what it printed
+    if interpreter is None:
+        interpreter = Interpreter()
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        interpreter.execute(parse(source))
+    return interpreter, out.getvalue()
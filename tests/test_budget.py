@@ -0,0 +1,62 @@
+import unittest
+from support import Interpreter, Budget, BudgetExceeded, run
+import budget
+
+LOOP = """
+local x = 0
+printline("start")
+while (True):
+  local x = x + 1
+"""
+
+SPIN = """
+func spin(n):
+  while (True):
+    local n = n + 1
+spin(1)
+"""
+
+class BudgetTest(unittest.TestCase):
+    def run_limited(self, source, **limits):
+        interpreter = Interpreter()
+        interpreter.set_budget(Budget(**limits))
+        return run(source, interpreter)
+
+    def assertExceeds(self, source, message, **limits):
+        with self.assertRaises(BudgetExceeded) as caught:
+            self.run_limited(source, **limits)
+        self.assertEqual(str(caught.exception), message)
+
+    def test_step_limit(self):
+        self.assertExceeds(LOOP, "Step limit of 5000 exceeded at line 5", max_steps=5000)
+        self.assertExceeds(SPIN, "Step limit of 5000 exceeded at line 4", max_steps=5000)
+
+    def test_step_limit_is_exact(self):
+        source = "table t = {}\nfor i in range(10):\n  t.x = i\nprintline(t.x)\n"
+        # Three top-level statements, and the loop body runs ten times
+        _, out = self.run_limited(source, max_steps=13)
+        self.assertEqual(out.split(), ['9'])
+        with self.assertRaises(BudgetExceeded):
+            self.run_limited(source, max_steps=12)
+
+    def test_time_limit(self):
+        self.assertExceeds(LOOP, "Time limit of 0.05s exceeded at line 5", max_time=0.05)
+        self.assertExceeds(SPIN, "Time limit of 0.05s exceeded at line 4", max_time=0.05)
+
+    def test_memory_limit(self):
+        if budget.current_memory() is None:
+            self.skipTest("memory use can't be read here")
+        self.assertExceeds(LOOP, "Memory limit of 1 MB exceeded at line 5", max_memory=1024 * 1024)
+
+    def test_jit_stays_off(self):
+        interpreter, _ = self.run_limited("""
+func add(a, b):
+  return a + b
+table t = {}
+for i in range(300):
+  t.x = add(i, 1)
+""", max_steps=10000)
+        self.assertIsNone(interpreter.glob_env.get('add').compiled)
+
+if __name__ == '__main__':
+    unittest.main()
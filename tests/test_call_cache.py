@@ -0,0 +1,64 @@
+import unittest
+from support import run
+
+FUNCS = """
+func one():
+  return 1
+func two():
+  return 2
+func call():
+  return one()
+"""
+
+class CallCacheTest(unittest.TestCase):
+    def test_global_redefinition(self):
+        _, out = run(FUNCS + """
+local a = call()
+func one():
+  return 3
+printline(a, call())
+""")
+        self.assertEqual(out.split(), ['1', '3'])
+
+    def test_global_assignment(self):
+        _, out = run(FUNCS + """
+local a = call()
+local one = two
+printline(a, call())
+""")
+        self.assertEqual(out.split(), ['1', '2'])
+
+    def test_parameter_shadows_callee(self):
+        _, out = run(FUNCS + """
+func through(one):
+  return call()
+printline(call(), through(two), call())
+""")
+        self.assertEqual(out.split(), ['1', '2', '1'])
+
+    def test_local_shadows_callee(self):
+        _, out = run(FUNCS + """
+func outer():
+  local one = two
+  return call()
+printline(call(), outer(), call())
+""")
+        self.assertEqual(out.split(), ['1', '2', '1'])
+
+    def test_rebinding_after_call_site_is_hot(self):
+        # Enough calls for the JIT to compile call() before the rebinding
+        _, out = run(FUNCS + """
+table seen = {}
+for i in range(300):
+  seen.before = call()
+func outer():
+  local one = two
+  return call()
+func one():
+  return 3
+printline(seen.before, outer(), call())
+""")
+        self.assertEqual(out.split(), ['1', '2', '3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FFLING = os.path.join(ROOT, 'ffling')
+EXAMPLES = os.path.join(ROOT, 'examples')
+
+class ConformanceTest(unittest.TestCase):
+    def test_examples(self):
+        # Run from ffling/ in a subprocess: its ast.py shadows the stdlib
+        # module, which the test runner has already imported
+        result = subprocess.run([sys.executable, 'main.py', 'conformance', EXAMPLES],
+                                cwd=FFLING, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(" 0 failed, 0 skipped", result.stdout)
+
+if __name__ == '__main__':
+    unittest.main()
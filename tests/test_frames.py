@@ -0,0 +1,75 @@
+import unittest
+from support import run
+
+FUNCS = """
+func add(a, b):
+  local c = a + b
+  return c
+func fib(n):
+  if (n < 2):
+    return n
+  return fib(n - 1) + fib(n - 2)
+"""
+
+class FramePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.interpreter, _ = run(FUNCS)
+        # Keep the JIT out of it: compiled functions don't use these frames
+        for name in ('add', 'fib'):
+            self.interpreter.glob_env.get(name).compiled = False
+        self.stats = self.interpreter.frame_stats
+
+    def calls(self, source):
+        before = dict(self.stats)
+        _, out = run(source, self.interpreter)
+        return (self.stats['allocated'] - before['allocated'],
+                self.stats['reused'] - before['reused'], out)
+
+    def test_steady_state_calls_reuse_frames(self):
+        allocated, reused, _ = self.calls("add(1, 2)")
+        self.assertEqual((allocated, reused), (1, 0))
+        allocated, reused, out = self.calls("""
+table t = {}
+for i in range(500):
+  t.x = add(i, 1)
+printline(t.x)
+""")
+        self.assertEqual((allocated, reused), (0, 500))
+        self.assertEqual(out.split(), ['500'])
+
+    def test_recursion_allocates_its_depth_once(self):
+        allocated, _, out = self.calls("printline(fib(12))")
+        self.assertEqual(out.split(), ['144'])
+        self.assertEqual(allocated, 12)
+        allocated, reused, out = self.calls("printline(fib(12))")
+        self.assertEqual(out.split(), ['144'])
+        self.assertEqual(allocated, 0)
+        self.assertEqual(reused, 465)
+
+    def test_recycled_frames_start_clean(self):
+        _, out = run("""
+func remember(x):
+  if (x):
+    local seen = x
+  printline(seen)
+local seen = "global"
+remember(1)
+remember(0)
+""", self.interpreter)
+        self.assertEqual(out.split(), ['1', 'global'])
+
+    def test_calls_from_compiled_code_reuse_frames(self):
+        interpreter, _ = run(FUNCS + """
+func twice(n):
+  return add(n, n)
+table t = {}
+for i in range(300):
+  t.x = twice(i)
+""")
+        self.assertTrue(interpreter.glob_env.get('twice').compiled)
+        before = interpreter.frame_stats['allocated']
+        run("for i in range(300):\n  t.x = twice(i)\n", interpreter)
+        self.assertEqual(interpreter.frame_stats['allocated'], before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from support import History, history
+
+ENTRIES = [
+    "local total = 0",
+    "for i in range(10):",
+    "  total = total + i",
+    "printline(total)",
+    "table t = {1, 2}",
+    "printline(t[0], #t)",
+    "func add(a, b):",
+    "printline(add(1, 2))",
+    "local subtotal = 5",
+    ":load examples/range_values.ffling",
+]
+
+QUERIES = [
+    "total", "otal", "tota", "ota", "printline(", "line(t", "add(1", "(a, b)",
+    " = ", "#", "[0]", "range", "range(10):", "examples/", "nothing here", "",
+]
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'history')
+        self.history = History(self.path)
+
+    def fill(self, entries):
+        for entry in entries:
+            self.history.add(entry)
+
+    def test_search_matches_substrings(self):
+        self.fill(ENTRIES)
+        for query in QUERIES:
+            expected = [entry for entry in ENTRIES if query in entry][-10:]
+            self.assertEqual(self.history.search(query), expected, query)
+
+    def test_search_limit_keeps_newest(self):
+        self.fill(f"printline({i})" for i in range(30))
+        self.assertEqual(self.history.search("printline", limit=3),
+                         ["printline(27)", "printline(28)", "printline(29)"])
+
+    def test_index_follows_new_entries(self):
+        self.fill(ENTRIES[:3])
+        self.assertEqual(self.history.search("printline"), [])
+        self.fill(ENTRIES[3:])
+        self.assertEqual(self.history.search("printline"), [ENTRIES[3], ENTRIES[5], ENTRIES[7]])
+
+    def test_reload_from_file(self):
+        self.fill(ENTRIES)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('not json\n{"not": "a string"}\n')
+        reloaded = History(self.path)
+        self.assertEqual(len(reloaded), len(ENTRIES))
+        self.assertEqual(reloaded[-1], ENTRIES[-1])
+        self.assertEqual(reloaded.search("subtotal"), ["local subtotal = 5"])
+
+    def test_eviction_drops_oldest(self):
+        with mock.patch.object(history, 'MAX_BYTES', 2000), mock.patch.object(history, 'KEEP_BYTES', 1000):
+            self.history.search("warm the index up")
+            entries = [f"local value{i} = {i}" for i in range(200)]
+            self.fill(entries)
+            self.assertLessEqual(os.path.getsize(self.path), 2000)
+            kept = len(self.history)
+            self.assertLess(kept, len(entries))
+            self.assertEqual(self.history[-kept:], entries[-kept:])
+            self.assertEqual(History(self.path)[:], entries[-kept:])
+            self.assertEqual(self.history.search("value0 "), [])
+            self.assertEqual(self.history.search("value199"), ["local value199 = 199"])
+            self.assertEqual(self.history.search("= 19"), [e for e in entries[-kept:] if "= 19" in e][-10:])
+
+    def test_clear(self):
+        self.fill(ENTRIES)
+        self.history.clear()
+        self.assertEqual(len(self.history), 0)
+        self.assertEqual(self.history.search("total"), [])
+        self.assertEqual(len(History(self.path)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
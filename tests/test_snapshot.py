@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from support import Interpreter, FuncDef, FFTable, run, snapshot
+
+SOURCE = """
+local n = 0 - 300
+local half = 5 / 2
+local name = "héllo"
+local flag = 1 < 2
+local r = range(10, 0, 0 - 3)
+table t = {1, 2, 3}
+t.name = "table"
+t.me = t
+table shared = {}
+shared.inner = {4, 5}
+shared.again = shared.inner
+func add(a, b):
+  return a + b
+"""
+
+class SnapshotTest(unittest.TestCase):
+    def round_trip(self, source):
+        interpreter, _ = run(source)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'session.ffsnap')
+            skipped = snapshot.save(interpreter, path)
+            loaded = Interpreter()
+            names = snapshot.load(loaded, path)
+        self.assertEqual(skipped, [])
+        return loaded, names
+
+    def test_values(self):
+        loaded, names = self.round_trip(SOURCE)
+        self.assertEqual(names, ['n', 'half', 'name', 'flag', 'r', 't', 'shared', 'add'])
+        get = loaded.glob_env.get
+        self.assertEqual(get('n'), -300)
+        self.assertEqual(get('half'), 2.5)
+        self.assertEqual(get('name'), "héllo")
+        self.assertIs(get('flag'), True)
+        self.assertEqual(get('r'), range(10, 0, -3))
+        self.assertIsInstance(get('add'), FuncDef)
+        _, out = run("printline(add(n, 1), #t, t[1], t.name, r[1])", loaded)
+        self.assertEqual(out.split(), ['-299', '3', '2', 'table', '7'])
+
+    def test_cyclic_and_shared_tables(self):
+        loaded, _ = self.round_trip(SOURCE)
+        t = loaded.glob_env.get('t')
+        self.assertIs(t.hash['me'], t)
+        shared = loaded.glob_env.get('shared')
+        self.assertIs(shared.hash['inner'], shared.hash['again'])
+        self.assertEqual(shared.hash['inner'].array, [4, 5])
+
+    def test_tables_load_lazily(self):
+        loaded, _ = self.round_trip(SOURCE)
+        t = loaded.glob_env.get('t')
+        self.assertIsInstance(t, snapshot.LazyTable)
+        self.assertIsInstance(t, FFTable)
+        self.assertNotIn('array', vars(t))
+        self.assertNotIn('hash', vars(t))
+        self.assertEqual(t.array, [1, 2, 3])
+        self.assertIn('hash', vars(t))
+        self.assertIsNone(t._reader)
+        # Tables it refers to stay unread until they are used themselves
+        inner = loaded.glob_env.get('shared').hash['inner']
+        self.assertNotIn('array', vars(inner))
+
+    def test_deep_expression(self):
+        # Deeper than the recursion limit, as a chain of BinOp nodes
+        loaded, _ = self.round_trip("func count():\n  return " + " + ".join(["1"] * 5000) + "\n")
+        _, out = run("printline(count())", loaded)
+        self.assertEqual(out.split(), ['5000'])
+
+    def test_builtins_are_not_saved(self):
+        loaded, names = self.round_trip("import time\nlocal x = 1\n")
+        self.assertEqual(names, ['x'])
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.Reader(b'not a snapshot')
+
+if __name__ == '__main__':
+    unittest.main()